@@ -0,0 +1,191 @@
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def idempotency_key(request_id: str, action: str) -> str:
+    # Stable across retries and restarts of the same request
+    return hashlib.sha256(f"{request_id}:{action}".encode()).hexdigest()[:32]
+
+
+class PermanentActionError(Exception):
+    # Raised by a handler when retrying cannot help (e.g. a 4xx response)
+    pass
+
+
+async def simulated_action(action: str, key: str, latency: float = 0.0) -> Dict[str, Any]:
+    # Stand-in for the real CRM/ticketing integrations
+    if latency:
+        await asyncio.sleep(latency)
+    return {"details": "Simulated execution"}
+
+
+def http_action_handler(endpoint: str, timeout: float) -> Callable[[str, str], Awaitable[Dict[str, Any]]]:
+    # POSTs to <endpoint>/<action> with the idempotency key as a header, so a
+    # retry after a lost response is deduplicated by the receiving service
+    def post(action: str, key: str) -> Dict[str, Any]:
+        request = urllib.request.Request(f"{endpoint.rstrip('/')}/{action}", data=json.dumps({"action": action}).encode(),
+                                         headers={"Content-Type": "application/json", "Idempotency-Key": key})
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                body = response.read().decode('utf-8', errors='replace')
+        except urllib.error.HTTPError as e:
+            if 400 <= e.code < 500 and e.code not in (408, 429):
+                raise PermanentActionError(f"HTTP {e.code}") from e
+            raise
+        try:
+            return json.loads(body) if body else {}
+        except json.JSONDecodeError:
+            return {"details": body[:500]}
+
+    async def handler(action: str, key: str) -> Dict[str, Any]:
+        return await asyncio.get_running_loop().run_in_executor(None, post, action, key)
+    return handler
+
+
+class ActionExecutor:
+    # Runs a request's actions concurrently on one background event loop, each
+    # with a timeout and exponential-backoff retries. Every action carries an
+    # idempotency key (request_id + action); a key that already succeeded, here
+    # or in action_executions, returns the stored result instead of running again.
+    def __init__(self, handler: Callable[[str, str], Awaitable[Dict[str, Any]]], db_conn_func=None,
+                 timeout: float = 5.0, max_attempts: int = 3, backoff_base: float = 0.1,
+                 backoff_max: float = 2.0, completed_size: int = 10000):
+        self.handler = handler
+        self.get_db_conn = db_conn_func
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.completed_size = completed_size
+        self.completed = OrderedDict()
+        self.inflight = {}
+        self.loop = None
+        self.thread = None
+        self.lock = threading.Lock()
+        self.counters = {"executed": 0, "deduplicated": 0, "retries": 0, "timeouts": 0, "failed": 0}
+
+    def start(self):
+        with self.lock:
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                self.thread = threading.Thread(target=self.loop.run_forever, name="action-executor", daemon=True)
+                self.thread.start()
+        return self.loop
+
+    def close(self):
+        with self.lock:
+            if self.loop is not None:
+                self.loop.call_soon_threadsafe(self.loop.stop)
+                self.thread.join(timeout=5)
+                self.loop.close()
+                self.loop = None
+
+    def run(self, request_id: str, actions: List[str]) -> Dict[str, Dict[str, Any]]:
+        # Blocking entry point for pipeline threads
+        if not actions:
+            return {}
+        keys = {action: idempotency_key(request_id, action) for action in actions}
+        stored = self.load_completed(list(keys.values()))
+        future = asyncio.run_coroutine_threadsafe(self.run_all(keys, stored), self.start())
+        return future.result()
+
+    def load_completed(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        # Successful executions from an earlier run of this request, e.g. a job
+        # recovered after a restart
+        missing = [key for key in keys if key not in self.completed]
+        if not missing or self.get_db_conn is None:
+            return {}
+        conn = self.get_db_conn()
+        try:
+            rows = conn.execute(
+                f"SELECT idempotency_key, result FROM action_executions "
+                f"WHERE status = 'success' AND idempotency_key IN ({','.join('?' * len(missing))})",
+                missing).fetchall()
+        finally:
+            conn.close()
+        return {key: json.loads(result) for key, result in rows}
+
+    async def run_all(self, keys: Dict[str, str], stored: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        results = await asyncio.gather(*(self.run_once(action, key, stored.get(key))
+                                         for action, key in keys.items()))
+        return dict(zip(keys, results))
+
+    async def run_once(self, action: str, key: str, stored: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        # All of this runs on the executor's loop thread, so the dicts need no lock
+        previous = self.completed.get(key) or stored
+        if previous is not None:
+            self.counters["deduplicated"] += 1
+            return dict(previous, deduplicated=True)
+        if key in self.inflight:
+            # The same request/action is already running; share its outcome
+            self.counters["deduplicated"] += 1
+            return dict(await asyncio.shield(self.inflight[key]), deduplicated=True)
+
+        task = asyncio.ensure_future(self.execute(action, key))
+        self.inflight[key] = task
+        try:
+            result = await asyncio.shield(task)
+        finally:
+            self.inflight.pop(key, None)
+        if result["status"] == "success":
+            self.completed[key] = result
+            if len(self.completed) > self.completed_size:
+                self.completed.popitem(last=False)
+        return result
+
+    async def execute(self, action: str, key: str) -> Dict[str, Any]:
+        started_at = time.time()
+        start = time.perf_counter()
+        error = None
+        attempt = 0
+        while attempt < self.max_attempts:
+            attempt += 1
+            try:
+                details = await asyncio.wait_for(self.handler(action, key), self.timeout)
+                self.counters["executed"] += 1
+                return self.result(action, key, "success", attempt, started_at, start, details=details)
+            except PermanentActionError as e:
+                error = str(e)
+                break
+            except asyncio.TimeoutError:
+                self.counters["timeouts"] += 1
+                error = f"Timed out after {self.timeout}s"
+            except Exception as e:
+                error = str(e) or type(e).__name__
+            if attempt < self.max_attempts:
+                self.counters["retries"] += 1
+                # Full jitter keeps retries from many requests from lining up
+                await asyncio.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))))
+        self.counters["failed"] += 1
+        logger.warning("Action %s failed after %d attempts: %s", action, attempt, error)
+        return self.result(action, key, "failed", attempt, started_at, start, error=error)
+
+    @staticmethod
+    def result(action: str, key: str, status: str, attempts: int, started_at: float, start: float,
+               details=None, error: Optional[str] = None) -> Dict[str, Any]:
+        result = {
+            "status": status,
+            "action": action,
+            "details": details.get("details", details) if isinstance(details, dict) else details,
+            "idempotency_key": key,
+            "attempts": attempts,
+            "started_at": started_at,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 3)
+        }
+        if error is not None:
+            result["error"] = error
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self.counters, inflight=len(self.inflight), completed_keys=len(self.completed))
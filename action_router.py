@@ -1,70 +1,35 @@
 import json
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+import os
 import sqlite3
+import uuid
+from action_executor import ActionExecutor, simulated_action
+from metrics import timed
+from persistence import EXECUTION_INSERT, execution_row
+from rule_engine import RuleEngine
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "action_rules.json")
 
 
 class ActionRouter:
-    def __init__(self, db_conn_func):
+    def __init__(self, db_conn_func, rules_path: str = DEFAULT_RULES_PATH, reload_interval: float = 1.0,
+                 executor: Optional[ActionExecutor] = None):
         self.get_db_conn = db_conn_func
-        self.action_map = {
-            "complaint": {
-                "high": "escalate_to_crm",
-                "medium": "create_ticket",
-                "low": "log_and_close"
-            },
-            "invoice": {
-                "amount_exceeds_10k": "flag_for_review",
-                "default": "process_payment"
-            },
-            "fraud_risk": {
-                "default": "alert_security_team"
-            },
-            "regulation": {
-                "GDPR": "notify_compliance_gdpr",
-                "FDA": "notify_compliance_fda",
-                "default": "log_regulation"
-            }
-        }
+        # Intent -> action routing lives in the rules file (see rule_engine.py)
+        self.rules = RuleEngine(rules_path, reload_interval)
+        self.executor = executor or ActionExecutor(simulated_action, db_conn_func)
 
-    def determine_actions(self, agent_results: Dict[str, Any], classification: Dict[str, Any]) -> List[str]:
+    @timed("determine_actions")
+    def determine_actions(self, agent_results: Dict[str, Any], classification: Dict[str, Any],
+                          record=None) -> List[str]:
         intent = classification.get('intent', 'unknown')
-        actions = []
-
-        if intent in self.action_map:
-            intent_actions = self.action_map[intent]
-
-            if intent == "complaint":
-                urgency = agent_results.get('urgency', 'medium')
-                tone = agent_results.get('tone', 'neutral')
-
-                if tone in ['angry', 'threatening'] or urgency == 'high':
-                    actions.append(intent_actions['high'])
-                elif urgency == 'medium':
-                    actions.append(intent_actions['medium'])
-                else:
-                    actions.append(intent_actions['low'])
+        actions = self.rules.evaluate(agent_results, intent)
 
-            elif intent == "invoice":
-                if agent_results.get('fields', {}).get('total', 0) > 10000:
-                    actions.append(intent_actions['amount_exceeds_10k'])
-                else:
-                    actions.append(intent_actions['default'])
+        # Log actions to database, or to the request's pending transaction
+        if record is not None:
+            record.add_action_log(intent, actions)
+            return actions
 
-            elif intent == "fraud_risk":
-                actions.append(intent_actions['default'])
-
-            elif intent == "regulation":
-                regulations = agent_results.get('regulations_mentioned', [])
-                if regulations:
-                    for reg in regulations:
-                        if reg in intent_actions:
-                            actions.append(intent_actions[reg])
-                        else:
-                            actions.append(intent_actions['default'])
-                else:
-                    actions.append(intent_actions['default'])
-
-        # Log actions to database
         conn = self.get_db_conn()
         try:
             conn.execute(
@@ -76,26 +41,50 @@ class ActionRouter:
 
         return actions
 
-    def execute_actions(self, actions: List[str]) -> Dict[str, Any]:
-        results = {}
+    def determine_actions_batch(self, items: List[Tuple[Dict[str, Any], Dict[str, Any]]],
+                                records: Optional[List[Any]] = None) -> List[List[str]]:
+        # items are (agent_results, classification) pairs, evaluated against one
+        # rules snapshot and logged in a single transaction
+        intents = [classification.get('intent', 'unknown') for _, classification in items]
+        batch = self.rules.evaluate_batch([(agent_results, intent)
+                                           for (agent_results, _), intent in zip(items, intents)])
+        if records is not None:
+            for record, intent, actions in zip(records, intents, batch):
+                record.add_action_log(intent, actions)
+            return batch
+
         conn = self.get_db_conn()
         try:
-            for action in actions:
-                # Simulate action execution
-                result = {
-                    "status": "success",
-                    "action": action,
-                    "details": "Simulated execution"
-                }
-                results[action] = result
-
-                # Log execution to database
-                conn.execute(
-                    "INSERT INTO action_executions (action_name, result) VALUES (?, ?)",
-                    (action, json.dumps(result)))
-
+            conn.executemany(
+                "INSERT INTO action_logs (intent, determined_actions) VALUES (?, ?)",
+                [(intent, json.dumps(actions)) for intent, actions in zip(intents, batch)])
             conn.commit()
         finally:
             conn.close()
+        return batch
+
+    @timed("execute_actions")
+    def execute_actions(self, actions: List[str], record=None, request_id: Optional[str] = None) -> Dict[str, Any]:
+        # Actions run concurrently; request_id (from the record when there is one)
+        # seeds the idempotency keys
+        request_id = record.request_id if record is not None else request_id or str(uuid.uuid4())
+        results = self.executor.run(request_id, actions)
+
+        # Replays of an already-successful action were logged the first time
+        executed = [(action, result) for action, result in results.items() if not result.get('deduplicated')]
+        if record is not None:
+            for action, result in executed:
+                record.add_action_execution(action, result)
+            return results
+
+        if executed:
+            conn = self.get_db_conn()
+            try:
+                # Batch-log the executions with their timings
+                conn.executemany(EXECUTION_INSERT, [execution_row(request_id, action, result)
+                                                    for action, result in executed])
+                conn.commit()
+            finally:
+                conn.close()
 
-        return results
\ No newline at end of file
+        return results
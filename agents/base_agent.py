@@ -0,0 +1,110 @@
+import dataclasses
+from typing import Dict, Any, Iterable, Optional, Tuple
+from agents.json_extract import JSONExtractionError, extract_json, extraction_stats
+from metrics import span
+
+
+def json_generation_config() -> Optional[Dict[str, Any]]:
+    # JSON mode needs a google-generativeai release whose GenerationConfig has
+    # response_mime_type; older ones reject unknown keys, so leave it off there
+    try:
+        from google.generativeai.types import GenerationConfig
+        fields = {field.name for field in dataclasses.fields(GenerationConfig)}
+    except (ImportError, TypeError):
+        return None
+    return {"response_mime_type": "application/json"} if "response_mime_type" in fields else None
+
+
+class BaseAgent:
+    agent_name = "base"
+    # Bump when a prompt template changes so stale cached responses are not reused
+    prompt_version = "1"
+    # Corrective prompts sent when a reply cannot be turned into the expected JSON
+    max_reasks = 1
+    generation_config = json_generation_config()
+
+    def __init__(self, model, cache=None):
+        self.model = model
+        self.cache = cache
+
+    @staticmethod
+    def text_sample(content, limit: int) -> str:
+        # Binary inputs (PDF bytes or a spooled upload) are sampled as latin-1,
+        # which maps every byte to one character
+        sample = content[:limit]
+        if isinstance(sample, (bytes, bytearray)):
+            sample = sample.decode('latin-1')
+        return sample
+
+    @staticmethod
+    def parse_reply(response_text: str, required_keys: Iterable[str] = ()) -> Tuple[Dict[str, Any], str]:
+        parsed, outcome = extract_json(response_text)
+        missing = [k for k in required_keys if k not in parsed]
+        if missing:
+            raise JSONExtractionError(f"Reply is missing keys: {', '.join(missing)}")
+        return parsed, outcome
+
+    def call_model(self, prompt: str) -> str:
+        with span("llm_call"):
+            if self.generation_config is None:
+                return self.model.generate_content(prompt).text
+            return self.model.generate_content(prompt, generation_config=self.generation_config).text
+
+    def generate_json(self, prompt: str, content: str, use_cache: bool = True,
+                      required_keys: Iterable[str] = (), namespace: Optional[str] = None) -> Dict[str, Any]:
+        # Returns the reply as a dict; LLMUnavailableError and model errors
+        # propagate, JSONExtractionError means even the re-ask was unusable
+        key = None
+        if self.cache is not None:
+            if use_cache:
+                model_name = getattr(self.model, 'model_name', 'unknown')
+                key = self.cache.make_key(namespace or self.agent_name, self.prompt_version, model_name, content)
+                cached = self.cache.get(key)
+                if cached is not None:
+                    try:
+                        return self.parse_reply(cached, required_keys)[0]
+                    except JSONExtractionError:
+                        pass
+            else:
+                self.cache.record_bypass()
+
+        response_text = self.call_model(prompt)
+        try:
+            parsed, outcome = self.parse_reply(response_text, required_keys)
+            extraction_stats.record(outcome)
+        except JSONExtractionError as e:
+            parsed, response_text = self.reask(prompt, response_text, e, required_keys)
+
+        # Only usable replies reach the cache, so a garbled answer is retried next time
+        if key is not None:
+            self.cache.set(key, response_text)
+        return parsed
+
+    def reclassify(self, content, agent_results: Dict[str, Any], classification: Dict[str, Any],
+                   use_cache: bool = True) -> Dict[str, Any]:
+        # Brings a result produced under a provisional classification up to
+        # date; agents whose output depends on the intent override this
+        if isinstance(agent_results, dict):
+            agent_results['classification'] = classification
+        return agent_results
+
+    def reask(self, prompt: str, response_text: str, error: Exception,
+              required_keys: Iterable[str] = ()) -> Tuple[Dict[str, Any], str]:
+        for _ in range(self.max_reasks):
+            extraction_stats.record("reasked")
+            response_text = self.call_model(f"""{prompt}
+
+        Your previous reply could not be used ({error}). It began:
+        {response_text[:300]}
+
+        Reply again with only the JSON object: no markdown fences and no commentary.
+        """)
+            try:
+                parsed, _ = self.parse_reply(response_text, required_keys)
+            except JSONExtractionError as e:
+                error = e
+                continue
+            extraction_stats.record("reask_recovered")
+            return parsed, response_text
+        extraction_stats.record("failed")
+        raise error
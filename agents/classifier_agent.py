@@ -1,12 +1,26 @@
 import json
-from typing import Dict, Any
+import logging
+import threading
+from typing import Dict, Any, Optional
 import google.generativeai as genai
+from agents.base_agent import BaseAgent
+from llm_gateway import LLMUnavailableError
+from metrics import timed
 
+logger = logging.getLogger(__name__)
 
-class ClassifierAgent:
-    def __init__(self, model, db_conn_func):
-        self.model = model
+
+class ClassifierAgent(BaseAgent):
+    agent_name = "classifier"
+
+    def __init__(self, model, db_conn_func, cache=None, fast_path=None, fast_path_threshold: float = 0.85):
+        super().__init__(model, cache)
         self.get_db_conn = db_conn_func
+        self.fast_path = fast_path
+        self.fast_path_threshold = fast_path_threshold
+        # Classifications run on many worker threads at once
+        self.fallbacks_lock = threading.Lock()
+        self.fallbacks = 0
         self.few_shot_examples = """
         Examples of format and intent classification:
 
@@ -31,7 +45,31 @@ class ClassifierAgent:
            Intent: fraud_risk
         """
 
-    def classify(self, content: str, input_type: str) -> Dict[str, Any]:
+    def fast_classify(self, content: str, input_type: str, record=None) -> Optional[Dict[str, Any]]:
+        if self.fast_path is None:
+            return None
+
+        candidate = self.fast_path.classify(content, input_type)
+        scores = candidate.pop('scores', {})
+        taken = candidate['confidence'] >= self.fast_path_threshold
+        logger.info("classification path=%s intent=%s confidence=%.3f threshold=%.3f scores=%s",
+                    "rules" if taken else "llm", candidate['intent'], candidate['confidence'],
+                    self.fast_path_threshold, scores)
+        if not taken:
+            return None
+
+        candidate['source'] = "rules"
+        self.log_classification(content, candidate, record)
+        return candidate
+
+    @timed("classify")
+    def classify(self, content: str, input_type: str, use_cache: bool = True, record=None) -> Dict[str, Any]:
+        # Confident local rules skip the Gemini round-trip entirely
+        fast = self.fast_classify(content, input_type, record)
+        if fast is not None:
+            return fast
+
+        sample = self.text_sample(content, 5000)
         prompt = f"""
         {self.few_shot_examples}
 
@@ -40,37 +78,57 @@ class ClassifierAgent:
         2. The business intent (rfq, complaint, invoice, regulation, fraud_risk)
 
         Input:
-        {content[:5000]}
+        {sample}
 
         Provide your response in JSON format with keys: format, intent, confidence
         """
 
-        response = self.model.generate_content(prompt)
         try:
-            response_text = response.text
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
-            json_str = response_text[json_start:json_end]
-            classification = json.loads(json_str)
-
-            if 'format' not in classification or 'intent' not in classification:
-                raise ValueError("Invalid classification format")
-
-            # Log classification to database
-            conn = self.get_db_conn()
-            try:
-                conn.execute(
-                    "INSERT INTO classifications (content_sample, classification_result) VALUES (?, ?)",
-                    (content[:500], json.dumps(classification)))
-                conn.commit()
-            finally:
-                conn.close()
-
-            return classification
-        except Exception as e:
+            classification = self.generate_json(prompt, sample, use_cache, required_keys=('format', 'intent'))
+        except LLMUnavailableError as e:
+            return self.fallback_classify(content, input_type, record, e)
+        except ValueError as e:
+            # Still not usable JSON after the corrective re-ask
             return {
                 "format": input_type,
                 "intent": "unknown",
                 "confidence": 0.5,
                 "error": str(e)
-            }
\ No newline at end of file
+            }
+        classification['source'] = "llm"
+
+        # Log classification to database
+        self.log_classification(content, classification, record)
+
+        return classification
+
+    def fallback_classify(self, content: str, input_type: str, record, error: Exception) -> Dict[str, Any]:
+        # The gateway is shedding load or the breaker is open: take the local
+        # rules' best guess whatever its confidence rather than "unknown"
+        with self.fallbacks_lock:
+            self.fallbacks += 1
+        if self.fast_path is None:
+            return {"format": input_type, "intent": "unknown", "confidence": 0.0, "error": str(error)}
+        candidate = self.fast_path.classify(content, input_type)
+        candidate.pop('scores', None)
+        candidate['source'] = "rules_fallback"
+        candidate['degraded_reason'] = type(error).__name__
+        logger.warning("classification path=rules_fallback intent=%s confidence=%.3f reason=%s",
+                       candidate['intent'], candidate['confidence'], error)
+        self.log_classification(content, candidate, record)
+        return candidate
+
+    def log_classification(self, content: str, classification: Dict[str, Any], record=None):
+        # Defer to the request's single transaction when a record is collecting rows
+        if record is not None:
+            record.add_classification(self.text_sample(content, 500), classification)
+            return
+
+        conn = self.get_db_conn()
+        try:
+            conn.execute(
+                "INSERT INTO classifications (content_sample, classification_result) VALUES (?, ?)",
+                (self.text_sample(content, 500), json.dumps(classification)))
+            conn.commit()
+        finally:
+            conn.close()
@@ -1,49 +1,205 @@
-import json
-from typing import Dict, Any
+import contextvars
+from typing import Dict, Any, List, Optional
 import re
-import google.generativeai as genai
+from email import policy
+from email.parser import BytesParser, Parser
+from email.utils import parseaddr
+from agents.base_agent import BaseAgent
+from metrics import timed
+from profiling import run_profiled
 
+TAG_PATTERN = re.compile(r'<[^>]+>')
 
-class EmailAgent:
-    def __init__(self, model, redis_client):
-        self.model = model
+
+class ParsedEmail:
+    # Headers, decoded body text and attachments of one RFC 822/MIME message
+    def __init__(self, headers: Dict[str, str], sender: Optional[Dict[str, str]], body: str,
+                 attachments: List[Dict[str, Any]]):
+        self.headers = headers
+        self.sender = sender
+        self.body = body
+        self.attachments = attachments
+
+
+class EmailAgent(BaseAgent):
+    agent_name = "email"
+    prompt_version = "2"
+
+    header_names = ("subject", "from", "to", "cc", "date", "message-id", "in-reply-to")
+    # Any of these makes the input a message; otherwise a leading "Note: ..."
+    # line is prose, not a header, and the whole input is the body
+    known_headers = set(header_names) | {"mime-version", "content-type", "content-transfer-encoding", "reply-to",
+                                         "sender", "received", "return-path", "references"}
+
+    def __init__(self, model, redis_client, cache=None, attachment_agents: Optional[Dict[str, BaseAgent]] = None,
+                 executor=None):
+        super().__init__(model, cache)
         self.redis = redis_client
+        # Attached PDFs/JSON files go to these agents, concurrently when an
+        # executor is given (it must not be the pool running this agent)
+        self.attachment_agents = attachment_agents or {}
+        self.executor = executor
+
+    def parse(self, email_content) -> ParsedEmail:
+        if isinstance(email_content, (bytes, bytearray)):
+            message = BytesParser(policy=policy.default).parsebytes(email_content)
+        else:
+            message = Parser(policy=policy.default).parsestr(email_content)
+
+        if not any(name.lower() in self.known_headers for name in message.keys()):
+            body = email_content.decode('utf-8', errors='replace') if isinstance(email_content, (bytes, bytearray)) \
+                else email_content
+            return ParsedEmail({}, None, body.strip(), [])
+
+        headers = {name: str(message[name]) for name in self.header_names if message[name] is not None}
+        sender = None
+        if 'from' in headers:
+            name, address = parseaddr(headers['from'])
+            # A bare address has no display name; the address is the best name we have
+            sender = {"name": name or address, "email": address}
+
+        body_part = message.get_body(preferencelist=('plain', 'html'))
+        if body_part is None:
+            body = ""
+        else:
+            try:
+                body = body_part.get_content()
+            except (LookupError, UnicodeError):
+                # Unknown or wrong charset; keep what can be decoded
+                body = (body_part.get_payload(decode=True) or b"").decode(errors='replace')
+            if body_part.get_content_subtype() == 'html':
+                body = TAG_PATTERN.sub(' ', body)
+
+        attachments = []
+        for part in message.iter_attachments():
+            input_type = self.attachment_type(part.get_content_type(), part.get_filename() or "")
+            if input_type is None:
+                continue
+            attachments.append({
+                "filename": part.get_filename(),
+                "content_type": part.get_content_type(),
+                "input_type": input_type,
+                "payload": part.get_payload(decode=True) or b""
+            })
+        return ParsedEmail(headers, sender, body.strip(), attachments)
+
+    @staticmethod
+    def attachment_type(content_type: str, filename: str) -> Optional[str]:
+        filename = filename.lower()
+        if content_type == 'application/pdf' or filename.endswith('.pdf'):
+            return "pdf"
+        if content_type == 'application/json' or filename.endswith('.json'):
+            return "json"
+        return None
+
+    def prompt_text(self, parsed: ParsedEmail) -> str:
+        # Only the subject and decoded body reach the LLM; headers are parsed locally
+        subject = parsed.headers.get('subject')
+        text = f"Subject: {subject}\n\n{parsed.body}" if subject else parsed.body
+        return text[:5000]
+
+    @timed("email_agent")
+    def process(self, email_content: str, classification: Dict[str, Any],
+                use_cache: bool = True) -> Dict[str, Any]:
+        parsed = self.parse(email_content)
+        # Attachments run while the body goes to Gemini
+        attachments = self.start_attachments(parsed, classification, use_cache)
+        email_text = self.prompt_text(parsed)
+        # Ask for the sender only when there was no From: header to read it from
+        keys = "urgency, issue, tone, is_escalation" if parsed.sender else "sender, urgency, issue, tone, is_escalation"
 
-    def process(self, email_content: str, classification: Dict[str, Any]) -> Dict[str, Any]:
         # Extract structured fields using Gemini
         prompt = f"""
         Analyze the following email and extract:
-        1. Sender information (name, email)
-        2. Urgency level (low, medium, high)
-        3. Main issue or request
-        4. Tone (polite, angry, neutral, threatening)
+        1. Urgency level (low, medium, high)
+        2. Main issue or request
+        3. Tone (polite, angry, neutral, threatening)
+        {"" if parsed.sender else "4. Sender information (name, email)"}
 
         Also identify if this is an escalation.
 
         Email Content:
-        {email_content[:5000]}
+        {email_text}
 
         Return your response in JSON format with these keys:
-        sender, urgency, issue, tone, is_escalation
+        {keys}
         """
 
-        response = self.model.generate_content(prompt)
-
         try:
-            # Extract JSON from response
-            response_text = response.text
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
-            json_str = response_text[json_start:json_end]
-            extracted_data = json.loads(json_str)
+            # The prompt differs with and without a From: header while the cached
+            # text does not, so each variant gets its own cache entries
+            namespace = f"{self.agent_name}:{'sender' if parsed.sender else 'nosender'}"
+            extracted_data = self.generate_json(prompt, email_text, use_cache, namespace=namespace)
+        except Exception as e:
+            extracted_data = {
+                "error": str(e),
+                "content": email_content
+            }
+        return self.complete(extracted_data, parsed, classification, attachments)
+
+    def complete(self, extracted_data: Dict[str, Any], parsed: ParsedEmail, classification: Dict[str, Any],
+                 attachments: List[Dict[str, Any]]) -> Dict[str, Any]:
+        # Fill in what the headers say and merge attachment results
+        if parsed.sender:
+            extracted_data['sender'] = parsed.sender
+        extracted_data['headers'] = parsed.headers
+        if attachments:
+            extracted_data['attachments'] = self.collect_attachments(attachments)
+
+        # Add classification info
+        extracted_data['classification'] = classification
+        return extracted_data
 
-            # Add classification info
-            extracted_data['classification'] = classification
+    def start_attachments(self, parsed: ParsedEmail, classification: Dict[str, Any],
+                          use_cache: bool = True) -> List[Dict[str, Any]]:
+        entries = []
+        for attachment in parsed.attachments:
+            entry = {k: attachment[k] for k in ("filename", "content_type", "input_type")}
+            entry['size'] = len(attachment['payload'])
+            entries.append(entry)
+            agent = self.attachment_agents.get(attachment['input_type'])
+            if agent is None:
+                entry['result'] = {"error": "No agent for attachment type"}
+                continue
+            content = self.attachment_content(attachment)
+            if self.executor is None:
+                entry['result'] = self.run_attachment(agent, content, classification, use_cache)
+            else:
+                ctx = contextvars.copy_context()
+                entry['result'] = self.executor.submit(ctx.run, run_profiled, self.run_attachment, agent, content,
+                                                       classification, use_cache)
+        return entries
 
-            return extracted_data
+    @staticmethod
+    def attachment_content(attachment: Dict[str, Any]):
+        if attachment['input_type'] == "json":
+            return attachment['payload'].decode('utf-8', errors='replace')
+        return attachment['payload']
+
+    def reclassify(self, email_content, agent_results: Dict[str, Any], classification: Dict[str, Any],
+                   use_cache: bool = True) -> Dict[str, Any]:
+        # The body extraction does not depend on the intent, but attachment
+        # validation can; entries line up with the parsed attachments
+        if isinstance(agent_results, dict) and agent_results.get('attachments'):
+            parsed = self.parse(email_content)
+            for attachment, entry in zip(parsed.attachments, agent_results['attachments']):
+                agent = self.attachment_agents.get(attachment['input_type'])
+                if agent is not None and 'classification' in entry['result']:
+                    entry['result'] = agent.reclassify(self.attachment_content(attachment), entry['result'],
+                                                       classification, use_cache)
+        return super().reclassify(email_content, agent_results, classification, use_cache)
+
+    @staticmethod
+    def collect_attachments(entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        for entry in entries:
+            if hasattr(entry['result'], 'result'):
+                entry['result'] = entry['result'].result()
+        return entries
+
+    @staticmethod
+    def run_attachment(agent: BaseAgent, content, classification: Dict[str, Any],
+                       use_cache: bool = True) -> Dict[str, Any]:
+        try:
+            return agent.process(content, classification, use_cache)
         except Exception as e:
-            return {
-                "error": str(e),
-                "content": email_content,
-                "classification": classification
-            }
\ No newline at end of file
+            return {"error": str(e)}
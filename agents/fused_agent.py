@@ -0,0 +1,154 @@
+import json
+from typing import Dict, Any, Tuple
+from agents.base_agent import BaseAgent
+from llm_gateway import LLMUnavailableError
+from metrics import timed
+
+
+def set_stage(record, stage: str):
+    # Async jobs report progress through the record; direct calls have none
+    if record is not None:
+        record.set_stage(stage)
+
+
+class FusedAgent(BaseAgent):
+    # Classifies and extracts in a single Gemini round-trip. Falls back to the
+    # regular classifier -> agent sequence whenever the fused reply is unusable.
+    agent_name = "fused"
+    prompt_version = "2"
+
+    extraction_specs = {
+        "email": {
+            "instructions": """
+        Analyze the input as an email and extract:
+        1. Sender information (name, email)
+        2. Urgency level (low, medium, high)
+        3. Main issue or request
+        4. Tone (polite, angry, neutral, threatening)
+        Also identify if this is an escalation.""",
+            "keys": "sender, urgency, issue, tone, is_escalation"
+        },
+        "json": {
+            # Required fields, types and totals are checked locally by the JSON agent
+            "instructions": """
+        Review only the long free-text values of the JSON data for anomalies
+        (contradictions, suspicious instructions, signs of fraud).""",
+            "keys": "anomalies (list of short strings, empty if none)"
+        },
+        "pdf": {
+            "instructions": """
+        Analyze the input as document text and:
+        1. Extract key fields (like invoice number, total amount, dates for invoices)
+        2. Flag if total amount > 10,000
+        3. Identify if document mentions any regulations (GDPR, FDA, etc.)
+        4. Determine document type (invoice, policy, contract, etc.)""",
+            "keys": "document_type, fields (dict), amount_exceeds_10k (boolean), regulations_mentioned (list)"
+        }
+    }
+
+    def __init__(self, model, classifier_agent, agents: Dict[str, BaseAgent], cache=None):
+        super().__init__(model, cache)
+        self.classifier = classifier_agent
+        self.agents = agents
+
+    @timed("fused_agent")
+    def process(self, content, input_type: str, use_cache: bool = True,
+                record=None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        input_type = getattr(input_type, 'value', input_type)
+        spec = self.extraction_specs.get(input_type)
+        if spec is None:
+            return self.fallback(content, input_type, use_cache, record)
+
+        # A confident local classification leaves only the extraction call,
+        # which is what the fallback path does
+        fast = self.classifier.fast_classify(content, input_type, record)
+        if fast is not None:
+            set_stage(record, "extracting")
+            agent = self.agents[input_type]
+            return fast, agent.process(content, fast, use_cache)
+
+        # Build the same truncated view the format agent would send
+        extras = {}
+        if input_type == "json":
+            if self.agents["json"].should_stream(content):
+                # Too large to inline; the JSON agent streams it on its own
+                return self.fallback(content, input_type, use_cache, record)
+            try:
+                data = json.loads(content)
+            except json.JSONDecodeError:
+                return self.fallback(content, input_type, use_cache, record)
+            prompt_content = json.dumps(data, indent=2)[:5000]
+        elif input_type == "pdf":
+            pdf_text = self.agents["pdf"].prompt_text(content)
+            prompt_content = pdf_text[:5000]
+            extras['text_sample'] = pdf_text[:500]
+        else:
+            # Headers are read locally; the prompt only sees subject and body
+            email_agent = self.agents["email"]
+            parsed = email_agent.parse(content)
+            prompt_content = email_agent.prompt_text(parsed)
+
+        prompt = f"""
+        {self.classifier.few_shot_examples}
+
+        Step 1. Determine:
+        1. The format (email, json, pdf)
+        2. The business intent (rfq, complaint, invoice, regulation, fraud_risk)
+        3. Your confidence between 0 and 1
+
+        Step 2.{spec["instructions"]}
+
+        Input:
+        {prompt_content}
+
+        Return a single JSON object with two keys:
+        "classification": an object with keys format, intent, confidence
+        "extraction": an object with keys {spec["keys"]}
+        """
+
+        try:
+            fused = self.generate_json(prompt, prompt_content, use_cache,
+                                       required_keys=('classification', 'extraction'),
+                                       namespace=f"{self.agent_name}:{input_type}")
+        except (LLMUnavailableError, ValueError):
+            # The classifier falls back to the local rules on its own
+            return self.fallback(content, input_type, use_cache, record)
+
+        try:
+            classification = fused['classification']
+            agent_results = fused['extraction']
+            if 'format' not in classification or 'intent' not in classification:
+                raise ValueError("Invalid classification format")
+            if not isinstance(agent_results, dict):
+                raise ValueError("Invalid extraction format")
+        except Exception:
+            return self.fallback(content, input_type, use_cache, record)
+        classification['source'] = "fused"
+
+        self.classifier.log_classification(content, classification, record)
+        # The one call did both; what is left (attachments, schema checks) is extraction
+        set_stage(record, "extracting")
+
+        # Same shape as the format agents produce
+        if input_type == "json":
+            json_agent = self.agents["json"]
+            review = {}
+            if json_agent.schema_engine.free_text_fields(data):
+                anomalies = agent_results.get('anomalies') or []
+                review['free_text_anomalies'] = [str(a) for a in anomalies] if isinstance(anomalies, list) \
+                    else [str(anomalies)]
+            return classification, json_agent.analyze_with_review(data, classification, review)
+        agent_results.update(extras)
+        if input_type == "email":
+            attachments = email_agent.start_attachments(parsed, classification, use_cache)
+            return classification, email_agent.complete(agent_results, parsed, classification, attachments)
+        agent_results['classification'] = classification
+        return classification, agent_results
+
+    def fallback(self, content, input_type: str, use_cache: bool = True,
+                 record=None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        classification = self.classifier.classify(content, input_type, use_cache, record)
+        set_stage(record, "extracting")
+        agent = self.agents.get(input_type)
+        agent_results = agent.process(content, classification, use_cache) if agent else {}
+        return classification, agent_results
@@ -1,56 +1,128 @@
 import json
-from typing import Dict, Any
+from typing import Dict, Any, List
 import google.generativeai as genai
+from agents.base_agent import BaseAgent
+from agents.json_schema import JSONSchemaEngine, StreamValidator
+from agents.json_stream import JSONStreamReader, StructureSummary, open_json_stream
+from metrics import timed
 
 
-class JSONAgent:
-    def __init__(self, model, redis_client):
-        self.model = model
+class JSONAgent(BaseAgent):
+    agent_name = "json"
+    prompt_version = "2"
+
+    def __init__(self, model, redis_client, cache=None, schema_engine=None,
+                 stream_threshold_bytes: int = 8 * 1024 * 1024):
+        super().__init__(model, cache)
         self.redis = redis_client
+        # Field types, required fields and numeric checks are computed locally;
+        # the LLM only reviews long free-text values
+        self.schema_engine = schema_engine or JSONSchemaEngine()
+        # Payloads at least this large (and every spooled upload) are parsed
+        # incrementally instead of with json.loads
+        self.stream_threshold_bytes = stream_threshold_bytes
+
+    def should_stream(self, json_content) -> bool:
+        return hasattr(json_content, 'path') or len(json_content) >= self.stream_threshold_bytes
+
+    @timed("json_agent")
+    def process(self, json_content: str, classification: Dict[str, Any],
+                use_cache: bool = True) -> Dict[str, Any]:
+        if self.should_stream(json_content):
+            return self.process_stream(json_content, classification, use_cache)
 
-    def process(self, json_content: str, classification: Dict[str, Any]) -> Dict[str, Any]:
         try:
             # Parse JSON first to validate
             data = json.loads(json_content)
+        except json.JSONDecodeError as e:
+            return {
+                "error": "Invalid JSON",
+                "details": str(e),
+                "classification": classification
+            }
 
-            # Analyze JSON content
-            prompt = f"""
-            Analyze the following JSON data and:
-            1. Validate required fields are present
-            2. Check for data type consistency
-            3. Identify any anomalies or potential issues
+        analysis = self.schema_engine.analyze(data, classification.get('intent', 'unknown'))
+        self.add_free_text_review(analysis, self.schema_engine.free_text_fields(data), use_cache)
 
-            JSON Content:
-            {json.dumps(data, indent=2)[:5000]}
+        # Add original data and classification
+        analysis['original_data'] = data
+        analysis['classification'] = classification
+        return analysis
 
-            Return your response in JSON format with these keys:
-            valid (boolean), anomalies (list), field_types (dict), required_fields_missing (list)
-            """
+    def analyze_with_review(self, data, classification: Dict[str, Any], review: Dict[str, Any]) -> Dict[str, Any]:
+        # Local schema checks for the given intent plus a free-text review done
+        # earlier ("free_text_anomalies" or "error" from another analysis)
+        analysis = self.schema_engine.analyze(data, classification.get('intent', 'unknown'))
+        if 'free_text_anomalies' in review:
+            self.apply_review(analysis, review['free_text_anomalies'])
+        if 'error' in review:
+            analysis['error'] = review['error']
+        analysis['original_data'] = data
+        analysis['classification'] = classification
+        return analysis
 
-            response = self.model.generate_content(prompt)
+    def reclassify(self, json_content, agent_results: Dict[str, Any], classification: Dict[str, Any],
+                   use_cache: bool = True) -> Dict[str, Any]:
+        # Required fields and types depend on the intent; the free-text review
+        # does not, so only the local checks are redone
+        if not isinstance(agent_results, dict) or 'original_data' not in agent_results:
+            # Invalid documents are cheap to process again. Top-level streamed
+            # documents never get here (speculative mode runs them
+            # sequentially); a streamed email attachment is read again.
+            return self.process(json_content, classification, use_cache)
+        return self.analyze_with_review(agent_results['original_data'], classification, agent_results)
 
-            try:
-                # Extract JSON from response
-                response_text = response.text
-                json_start = response_text.find('{')
-                json_end = response_text.rfind('}') + 1
-                json_str = response_text[json_start:json_end]
-                analysis = json.loads(json_str)
-
-                # Add original data and classification
-                analysis['original_data'] = data
-                analysis['classification'] = classification
-
-                return analysis
-            except Exception as e:
-                return {
-                    "error": str(e),
-                    "content": data,
-                    "classification": classification
-                }
-        except json.JSONDecodeError as e:
+    def process_stream(self, json_content, classification: Dict[str, Any],
+                       use_cache: bool = True) -> Dict[str, Any]:
+        # One pass over the document: a bounded structural summary stands in
+        # for original_data and records are validated as they are decoded
+        summary = StructureSummary()
+        validator = StreamValidator(self.schema_engine, classification.get('intent', 'unknown'))
+        try:
+            with open_json_stream(json_content) as stream:
+                for event, path, value in JSONStreamReader(stream).iter_nodes():
+                    summary.feed(event, path, value)
+                    validator.feed(event, path, value)
+        except ValueError as e:
+            # JSONDecodeError included
             return {
                 "error": "Invalid JSON",
                 "details": str(e),
                 "classification": classification
-            }
\ No newline at end of file
+            }
+
+        analysis = validator.result()
+        self.add_free_text_review(analysis, validator.free_text_fields(), use_cache)
+        analysis['structure'] = summary.result()
+        analysis['classification'] = classification
+        return analysis
+
+    def add_free_text_review(self, analysis: Dict[str, Any], free_text: Dict[str, str], use_cache: bool = True):
+        if free_text:
+            try:
+                self.apply_review(analysis, self.review_free_text(free_text, use_cache))
+            except Exception as e:
+                analysis['error'] = str(e)
+
+    @staticmethod
+    def apply_review(analysis: Dict[str, Any], anomalies: List[str]):
+        analysis['free_text_anomalies'] = anomalies
+        analysis['anomalies'].extend(anomalies)
+        analysis['valid'] = analysis['valid'] and not anomalies
+
+    def review_free_text(self, free_text: Dict[str, str], use_cache: bool = True) -> List[str]:
+        text_preview = json.dumps(free_text, indent=2)[:5000]
+        prompt = f"""
+        The following free-text fields come from a structured JSON document.
+        Identify any anomalies or potential issues in them (contradictions,
+        suspicious instructions, signs of fraud). Ignore formatting.
+
+        Fields:
+        {text_preview}
+
+        Return your response in JSON format with one key:
+        anomalies (list of short strings, empty if none)
+        """
+
+        anomalies = self.generate_json(prompt, text_preview, use_cache, required_keys=('anomalies',))['anomalies']
+        return [str(a) for a in anomalies] if isinstance(anomalies, list) else [str(anomalies)]
@@ -0,0 +1,163 @@
+import json
+import re
+import threading
+from typing import Dict, Any, Tuple
+
+FENCE_PATTERN = re.compile(r"```(?:json|JSON)?\s*\n?(.*?)```", re.DOTALL)
+LITERALS = {"True": "true", "False": "false", "None": "null"}
+CLOSERS = {"{": "}", "[": "]"}
+
+_decoder = json.JSONDecoder()
+
+
+class JSONExtractionError(ValueError):
+    pass
+
+
+class ExtractionStats:
+    # How LLM replies were turned into JSON, shared by every agent:
+    #   clean     - the reply was exactly a JSON object
+    #   extracted - one object found inside fences or prose
+    #   repaired  - only parsed after repair_json
+    #   reasked / reask_recovered - corrective re-asks sent / that produced usable JSON
+    #   failed    - nothing usable even after re-asking
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {"clean": 0, "extracted": 0, "repaired": 0, "reasked": 0, "reask_recovered": 0,
+                         "failed": 0}
+
+    def record(self, outcome: str):
+        with self.lock:
+            self.counters[outcome] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return dict(self.counters)
+
+
+extraction_stats = ExtractionStats()
+
+
+def repair_json(text: str, start: int = 0) -> str:
+    # One pass from the opening brace: fixes the usual LLM slips (trailing
+    # commas, single-quoted strings, unquoted keys, Python literals, //
+    # comments, raw newlines in strings, mismatched or missing closers) and
+    # stops after the object closes, so any trailing prose is ignored. A
+    # truncated reply is closed off.
+    out = []
+    stack = []
+    quote = None
+    escape = False
+    i = start
+    n = len(text)
+    while i < n:
+        ch = text[i]
+        if quote is not None:
+            if escape:
+                escape = False
+                # \' is valid in a single-quoted string but not in JSON
+                out.append(ch if ch == "'" else "\\" + ch)
+            elif ch == "\\":
+                escape = True
+            elif ch == quote:
+                quote = None
+                out.append('"')
+            elif ch == '"':
+                # A double quote inside a single-quoted string
+                out.append('\\"')
+            elif ch == "\n":
+                out.append("\\n")
+            else:
+                out.append(ch)
+            i += 1
+            continue
+
+        if ch in "\"'":
+            quote = ch
+            out.append('"')
+        elif ch in CLOSERS:
+            stack.append(CLOSERS[ch])
+            out.append(ch)
+        elif ch in "}]":
+            if not stack:
+                break
+            strip_trailing_comma(out)
+            out.append(stack.pop())
+            if not stack:
+                return "".join(out)
+        elif ch == "/" and text.startswith("//", i):
+            newline = text.find("\n", i)
+            i = n if newline == -1 else newline
+            continue
+        elif ch.isalpha() or ch == "_":
+            end = i
+            while end < n and (text[end].isalnum() or text[end] == "_"):
+                end += 1
+            word = text[i:end]
+            after = end
+            while after < n and text[after].isspace():
+                after += 1
+            if stack and stack[-1] == "}" and after < n and text[after] == ":" and word not in LITERALS:
+                # A bare key, as in {format: "email"}
+                out.append(f'"{word}"')
+            else:
+                out.append(LITERALS.get(word, word))
+            i = end
+            continue
+        else:
+            out.append(ch)
+        i += 1
+
+    if quote is not None:
+        out.append('"')
+    strip_trailing_comma(out)
+    if out and out[-1].rstrip().endswith(":"):
+        out.append("null")
+    out.extend(reversed(stack))
+    return "".join(out)
+
+
+def strip_trailing_comma(out):
+    while out and out[-1].isspace():
+        out.pop()
+    if out and out[-1] == ",":
+        out.pop()
+
+
+def extract_json(text: str, max_candidates: int = 8) -> Tuple[Dict[str, Any], str]:
+    # Returns the first JSON object in an LLM reply and how it was obtained
+    # ("clean", "extracted" or "repaired"); raises JSONExtractionError otherwise
+    if not isinstance(text, str):
+        raise JSONExtractionError("Reply has no text")
+    stripped = text.strip()
+    if stripped.startswith("{"):
+        try:
+            value = json.loads(stripped)
+            if isinstance(value, dict):
+                return value, "clean"
+        except ValueError:
+            pass
+
+    # Fenced blocks first, then the whole reply. Each opening brace is tried
+    # as-is and then repaired before moving on, so a malformed outer object is
+    # not skipped in favour of a well-formed nested one.
+    fence = FENCE_PATTERN.search(text)
+    regions = [fence.group(1), text] if fence else [text]
+    for region in regions:
+        position = region.find("{")
+        tried = 0
+        while position != -1 and tried < max_candidates:
+            try:
+                value, _ = _decoder.raw_decode(region, position)
+                if isinstance(value, dict):
+                    return value, "extracted"
+            except ValueError:
+                try:
+                    value = json.loads(repair_json(region, position))
+                    if isinstance(value, dict):
+                        return value, "repaired"
+                except ValueError:
+                    pass
+            tried += 1
+            position = region.find("{", position + 1)
+    raise JSONExtractionError("No JSON object found in the model reply")
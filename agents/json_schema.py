@@ -0,0 +1,265 @@
+import math
+import re
+from typing import Dict, Any, List, Optional
+
+DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}([T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:?\d{2})?)?$')
+
+
+def infer_type(value) -> str:
+    # bool is checked before int because it is a subclass of it
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "integer"
+    if isinstance(value, float):
+        return "number"
+    if isinstance(value, str):
+        return "date" if DATE_PATTERN.match(value) else "string"
+    if isinstance(value, list):
+        return "array"
+    if isinstance(value, dict):
+        return "object"
+    return type(value).__name__
+
+
+def type_matches(actual: str, expected: str) -> bool:
+    if actual == expected:
+        return True
+    # Integers are valid numbers and dates are valid strings
+    return (expected == "number" and actual == "integer") or (expected == "string" and actual == "date")
+
+
+class JSONSchemaEngine:
+    # Required fields and expected types per intent, modelled on the
+    # ClassifierAgent few-shot examples
+    schemas = {
+        "invoice": {
+            "required": ["invoice_id", "total", "due_date"],
+            "types": {"invoice_id": "string", "total": "number", "due_date": "date", "items": "array"}
+        },
+        "fraud_risk": {
+            "required": ["transaction_id", "amount"],
+            "types": {"transaction_id": "string", "amount": "number", "flagged": "boolean"}
+        }
+    }
+
+    def __init__(self, schemas: Optional[Dict[str, Dict[str, Any]]] = None, free_text_chars: int = 80,
+                 tolerance: float = 0.01):
+        if schemas is not None:
+            self.schemas = schemas
+        # String values at least this long are handed to the LLM as free text
+        self.free_text_chars = free_text_chars
+        self.tolerance = tolerance
+
+    def analyze(self, data, intent: str, line_sum: Optional[float] = None) -> Dict[str, Any]:
+        anomalies = []
+        missing = []
+        if isinstance(data, dict):
+            field_types = {key: infer_type(value) for key, value in data.items()}
+            schema = self.schemas.get(intent)
+            if schema is not None:
+                missing = [field for field in schema.get("required", []) if data.get(field) is None]
+                for field, expected in schema.get("types", {}).items():
+                    actual = field_types.get(field)
+                    if actual is not None and actual != "null" and not type_matches(actual, expected):
+                        anomalies.append(f"{field} should be {expected}, got {actual}")
+            anomalies.extend(self.numeric_anomalies(data, line_sum))
+        else:
+            field_types = {"$": infer_type(data)}
+            if intent in self.schemas:
+                anomalies.append(f"expected an object for {intent}, got {field_types['$']}")
+
+        return {
+            "valid": not missing and not anomalies,
+            "anomalies": anomalies,
+            "field_types": field_types,
+            "required_fields_missing": missing
+        }
+
+    @staticmethod
+    def line_amount(item) -> Optional[float]:
+        if not isinstance(item, dict):
+            return None
+        quantity = item.get("quantity", 1)
+        price = item.get("price", item.get("unit_price"))
+        if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in (quantity, price)):
+            return None
+        return quantity * price
+
+    def numeric_anomalies(self, data: Dict[str, Any], line_sum: Optional[float] = None) -> List[str]:
+        # line_sum lets a streaming caller pass the items total it accumulated
+        anomalies = []
+        for field in ("total", "amount", "subtotal", "tax"):
+            value = data.get(field)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                if not math.isfinite(value):
+                    anomalies.append(f"{field} is not a finite number")
+                elif value < 0:
+                    anomalies.append(f"{field} is negative ({value})")
+
+        items = data.get("items")
+        total = data.get("total")
+        if line_sum is None and isinstance(items, list) and items:
+            line_sum = 0.0
+            for index, item in enumerate(items):
+                amount = self.line_amount(item)
+                if amount is None:
+                    anomalies.append(f"items[{index}] lacks numeric quantity and price")
+                    return anomalies
+                line_sum += amount
+        if line_sum is not None and isinstance(total, (int, float)) and not isinstance(total, bool):
+            # Tax and shipping are part of the total when they are given
+            expected = line_sum + sum(data.get(k, 0) for k in ("tax", "shipping")
+                                      if isinstance(data.get(k), (int, float)) and not isinstance(data.get(k), bool))
+            if abs(expected - total) > self.tolerance:
+                anomalies.append(f"total {total} does not match sum of items {round(expected, 2)}")
+        return anomalies
+
+    def free_text_fields(self, data, prefix: str = "") -> Dict[str, str]:
+        # Long strings anywhere in the document; the only part worth an LLM look
+        fields = {}
+        if isinstance(data, dict):
+            children = ((f"{prefix}{key}", value) for key, value in data.items())
+        elif isinstance(data, list):
+            children = ((f"{prefix}[{index}]", value) for index, value in enumerate(data))
+        else:
+            return fields
+        for path, value in children:
+            if isinstance(value, str):
+                if len(value) >= self.free_text_chars:
+                    fields[path] = value
+            else:
+                child_prefix = path if isinstance(value, list) else f"{path}."
+                fields.update(self.free_text_fields(value, child_prefix))
+        return fields
+
+
+class StreamValidator:
+    # The streaming counterpart of JSONSchemaEngine.analyze, fed from
+    # JSONStreamReader events. Elements of a top-level array are validated
+    # record by record against the intent's schema; for a top-level object the
+    # scalar fields are kept and its "items" are summed as they stream past.
+    def __init__(self, engine: JSONSchemaEngine, intent: str, max_anomalies: int = 50,
+                 max_fields: int = 200, sample_records: int = 20):
+        self.engine = engine
+        self.intent = intent
+        self.max_anomalies = max_anomalies
+        self.max_fields = max_fields
+        self.sample_records = sample_records
+        self.root_type = None
+        self.root_value = None
+        self.header = {}
+        self.record_types = {}
+        self.line_sum = 0.0
+        self.line_count = 0
+        self.line_error = None
+        self.records = 0
+        self.invalid_records = 0
+        self.anomalies = []
+        self.dropped_anomalies = 0
+        self.missing = []
+        self.free_text = {}
+
+    def add_anomaly(self, message: str):
+        if len(self.anomalies) < self.max_anomalies:
+            self.anomalies.append(message)
+        else:
+            self.dropped_anomalies += 1
+
+    def feed(self, event: str, path: str, value):
+        if path == "$":
+            if event != "end":
+                self.root_type = "array" if event == "array" else "object" if event == "object" else infer_type(value)
+                if event == "value":
+                    self.root_value = value
+            return
+
+        if event == "value" and path == "$[]":
+            self.check_record(value)
+        elif path.count(".") == 1 and "[" not in path:
+            # A top-level field of the root object
+            key = path[2:]
+            if event == "value":
+                if len(self.header) < self.max_fields:
+                    self.header[key] = value
+            elif event in ("array", "object") and len(self.header) < self.max_fields:
+                self.header[key] = [] if event == "array" else {}
+        elif event == "value" and path == "$.items[]":
+            amount = self.engine.line_amount(value)
+            if amount is None:
+                if self.line_error is None:
+                    self.line_error = f"items[{self.line_count}] lacks numeric quantity and price"
+            else:
+                self.line_sum += amount
+            self.line_count += 1
+        if event == "value" and path.endswith("[]") and len(self.free_text) < self.sample_records:
+            self.free_text.update(self.engine.free_text_fields(value, path[1:].lstrip(".") + "."))
+
+    def free_text_fields(self) -> Dict[str, str]:
+        # Long strings from the top-level fields and the first few records
+        fields = self.engine.free_text_fields(self.header)
+        fields.update(self.free_text)
+        return fields
+
+    def check_record(self, record):
+        index = self.records
+        self.records += 1
+        result = self.engine.analyze(record, self.intent)
+        for key, actual in result["field_types"].items():
+            if actual == "null":
+                continue
+            types = self.record_types.get(key)
+            if types is None:
+                if len(self.record_types) >= self.max_fields:
+                    continue
+                types = self.record_types[key] = set()
+            types.add(actual)
+        if result["valid"]:
+            return
+        self.invalid_records += 1
+        for field in result["required_fields_missing"]:
+            self.add_anomaly(f"[{index}] missing required field {field}")
+        for anomaly in result["anomalies"]:
+            self.add_anomaly(f"[{index}] {anomaly}")
+
+    def result(self) -> Dict[str, Any]:
+        if self.root_type == "array":
+            field_types = {}
+            for key, types in self.record_types.items():
+                # Dates are strings too; only a real mismatch is an inconsistency
+                merged = {"string" if t == "date" and len(types) > 1 else t for t in types}
+                merged = {"number" if t == "integer" and "number" in merged else t for t in merged}
+                field_types[key] = "|".join(sorted(merged))
+                if len(merged) > 1:
+                    self.add_anomaly(f"{key} has inconsistent types across records: {field_types[key]}")
+            missing = []
+        elif self.root_type != "object":
+            # A bare scalar document is small enough to check directly
+            result = self.engine.analyze(self.root_value, self.intent)
+            field_types = result["field_types"]
+            missing = result["required_fields_missing"]
+            for anomaly in result["anomalies"]:
+                self.add_anomaly(anomaly)
+        else:
+            result = self.engine.analyze(self.header, self.intent,
+                                         self.line_sum if self.line_count and self.line_error is None else None)
+            field_types = result["field_types"]
+            missing = result["required_fields_missing"]
+            for anomaly in result["anomalies"]:
+                self.add_anomaly(anomaly)
+            if self.line_error is not None:
+                self.add_anomaly(self.line_error)
+
+        anomalies = list(self.anomalies)
+        if self.dropped_anomalies:
+            anomalies.append(f"... and {self.dropped_anomalies} more")
+        return {
+            "valid": not missing and not anomalies,
+            "anomalies": anomalies,
+            "field_types": field_types,
+            "required_fields_missing": missing,
+            "records_checked": self.records,
+            "records_invalid": self.invalid_records
+        }
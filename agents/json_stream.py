@@ -0,0 +1,207 @@
+import codecs
+import io
+import json
+import re
+from typing import Dict, Any, Iterator, Optional, Tuple
+
+from agents.json_schema import infer_type
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+# What may still follow a decoded number: "12." or "2.5e" cut at a chunk edge
+# decodes as 12 or 2.5 with the rest left over
+NUMBER_TAIL = re.compile(r'[0-9.eE+-]*\Z')
+DECODER = json.JSONDecoder()
+
+
+def open_json_stream(content):
+    # Spooled uploads are read from disk in chunks; in-memory payloads are
+    # wrapped without copying the string
+    if hasattr(content, 'path'):
+        return open(content.path, 'rb')
+    if isinstance(content, (bytes, bytearray)):
+        return io.BytesIO(content)
+    return io.StringIO(content)
+
+
+class JSONStreamReader:
+    # Walks the outer structure of a JSON document from a chunked stream.
+    # Objects are walked key by key, however deeply they nest, until an array
+    # is reached; arrays are walked element by element. Each array element (a
+    # record) is decoded in one raw_decode call, so memory is bounded by the
+    # largest record rather than the whole document, even for exports shaped
+    # like {"data": {"records": [...]}}. max_depth only guards against
+    # pathological nesting; anything below it is decoded whole.
+    #
+    # iter_nodes() yields (event, path, value):
+    #   ("object" | "array", path, None)  entering a walked container
+    #   ("value", path, value)            a fully decoded value
+    #   ("end", path, count)              leaving a walked container
+    # Paths look like "$", "$.items", "$.items[]" (every element shares "[]").
+    def __init__(self, stream, chunk_size: int = 64 * 1024, max_depth: int = 32):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.max_depth = max_depth
+        self.decoder = None if isinstance(stream, io.TextIOBase) else codecs.getincrementaldecoder('utf-8')('replace')
+        self.buffer = ""
+        self.pos = 0
+        self.consumed = 0
+        self.eof = False
+
+    def fill(self, at_least: int = 0):
+        # Drop the consumed prefix, then read; the read size grows with the
+        # pending value so a large record is not re-parsed once per chunk
+        self.consumed += self.pos
+        self.buffer = self.buffer[self.pos:]
+        self.pos = 0
+        chunk = self.stream.read(max(self.chunk_size, at_least))
+        if self.decoder is not None:
+            chunk = self.decoder.decode(chunk, final=not chunk)
+        if not chunk:
+            self.eof = True
+        self.buffer += chunk
+
+    def peek(self) -> str:
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if self.eof:
+                return ""
+            self.fill()
+
+    def offset(self) -> int:
+        # Character offset in the whole document, for error messages
+        return self.consumed + self.pos
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.offset()}, found {self.peek()!r}")
+        self.pos += 1
+
+    def decode_value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = DECODER.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise ValueError(f"{e.msg} at offset {self.consumed + e.pos}") from None
+                self.fill(len(self.buffer) - self.pos)
+                continue
+            # A number running up to the buffer edge may continue in the next chunk
+            if not self.eof and isinstance(value, (int, float)) and NUMBER_TAIL.match(self.buffer, end):
+                self.fill(len(self.buffer) - self.pos)
+                continue
+            self.pos = end
+            return value
+
+    def iter_nodes(self) -> Iterator[Tuple[str, str, Any]]:
+        yield from self.walk("$", 0)
+        if self.peek() != "":
+            raise ValueError(f"Extra data at offset {self.offset()}")
+
+    def walk(self, path: str, depth: int) -> Iterator[Tuple[str, str, Any]]:
+        char = self.peek()
+        if depth >= self.max_depth or char not in "{[" or char == "":
+            yield "value", path, self.decode_value()
+            return
+
+        if char == "{":
+            yield "object", path, None
+            self.pos += 1
+            count = 0
+            while self.peek() != "}":
+                if count:
+                    self.expect(",")
+                key = self.decode_value()
+                if not isinstance(key, str):
+                    raise ValueError(f"Expected an object key at offset {self.offset()}")
+                self.expect(":")
+                yield from self.walk(f"{path}.{key}", depth + 1)
+                count += 1
+            self.pos += 1
+        else:
+            yield "array", path, None
+            self.pos += 1
+            count = 0
+            while self.peek() != "]":
+                if count:
+                    self.expect(",")
+                yield "value", f"{path}[]", self.decode_value()
+                count += 1
+            self.pos += 1
+        yield "end", path, count
+
+
+def shrink(value, max_items: int = 3, max_chars: int = 200, depth: int = 2):
+    # A bounded copy of a sample value for the summary
+    if isinstance(value, str):
+        return value if len(value) <= max_chars else value[:max_chars] + "..."
+    if isinstance(value, list):
+        if depth <= 0:
+            return f"<array of {len(value)}>"
+        return [shrink(v, max_items, max_chars, depth - 1) for v in value[:max_items]]
+    if isinstance(value, dict):
+        if depth <= 0:
+            return f"<object with {len(value)} keys>"
+        return {k: shrink(v, max_items, max_chars, depth - 1) for k, v in list(value.items())[:max_items * 10]}
+    return value
+
+
+class StructureSummary:
+    # Keys, types, counts and a few sample elements per path, built from
+    # JSONStreamReader events in memory bounded by max_paths and samples
+    def __init__(self, samples: int = 3, max_paths: int = 200, max_keys: int = 50):
+        self.samples = samples
+        self.max_paths = max_paths
+        self.max_keys = max_keys
+        self.nodes = {}
+        self.truncated = False
+
+    def node(self, path: str) -> Optional[Dict[str, Any]]:
+        if path not in self.nodes:
+            if len(self.nodes) >= self.max_paths:
+                self.truncated = True
+                return None
+            self.nodes[path] = {"types": set(), "count": 0, "keys": {}, "samples": []}
+        return self.nodes[path]
+
+    def feed(self, event: str, path: str, value):
+        if event == "end":
+            node = self.node(path)
+            if node is not None:
+                node["count"] += value
+            return
+        node = self.node(path)
+        if node is None:
+            return
+        if event != "value":
+            node["types"].add(event)
+            return
+
+        node["types"].add(infer_type(value))
+        if isinstance(value, dict):
+            for key, item in value.items():
+                types = node["keys"].get(key)
+                if types is None:
+                    if len(node["keys"]) >= self.max_keys:
+                        self.truncated = True
+                        continue
+                    types = node["keys"][key] = set()
+                types.add(infer_type(item))
+        if path.endswith("[]") and len(node["samples"]) < self.samples:
+            node["samples"].append(shrink(value))
+
+    def result(self) -> Dict[str, Any]:
+        summary = {}
+        for path, node in self.nodes.items():
+            entry = {"type": "|".join(sorted(node["types"]))}
+            if node["count"]:
+                entry["count"] = node["count"]
+            if node["keys"]:
+                entry["keys"] = {k: "|".join(sorted(v)) for k, v in node["keys"].items()}
+            if node["samples"]:
+                entry["samples"] = node["samples"]
+            summary[path] = entry
+        return {"paths": summary, "truncated": self.truncated}
+
@@ -1,31 +1,171 @@
-import json
-from typing import Dict, Any
+import math
+import mmap
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Iterator, Iterable, List, Optional
 import PyPDF2
 import io
 import google.generativeai as genai
+from agents.base_agent import BaseAgent
+from metrics import timed
 
+PROMPT_CHARS = 5000
+SAMPLE_CHARS = 500
 
-class PDFAgent:
-    def __init__(self, model, redis_client):
-        self.model = model
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+def get_process_pool(workers: Optional[int] = None) -> ProcessPoolExecutor:
+    # One pool per process, shared by every request. Spawned rather than forked
+    # because the server process is multi-threaded.
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                                                mp_context=multiprocessing.get_context("spawn"))
+        return _process_pool
+
+
+def shutdown_process_pool():
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(cancel_futures=True)
+            _process_pool = None
+
+
+def extract_page_range(path: str, start: int, stop: int) -> List[str]:
+    # Runs in a pool worker. Only the path is pickled; the worker maps the file
+    # read-only, so the document is never copied into the task.
+    with open(path, 'rb') as f:
+        pdf_file = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    with pdf_file:
+        reader = PyPDF2.PdfReader(pdf_file)
+        return [reader.pages[i].extract_text() + "\n" for i in range(start, stop)]
+
+
+class PDFAgent(BaseAgent):
+    agent_name = "pdf"
+
+    def __init__(self, model, redis_client, cache=None, text_strategy: str = "budget",
+                 first_pages: int = 1, keywords: Iterable[str] = ("total", "amount due", "gdpr", "fda"),
+                 snippet_chars: int = 400, parallel_min_pages: int = 64, parallel_workers: Optional[int] = None):
+        super().__init__(model, cache)
         self.redis = redis_client
+        # "budget": read pages in order until the prompt is full
+        # "selective": first N pages plus snippets from later pages matching keywords
+        self.text_strategy = text_strategy
+        self.first_pages = first_pages
+        self.keyword_pattern = re.compile('|'.join(re.escape(k) for k in keywords), re.IGNORECASE) if keywords else None
+        self.snippet_chars = snippet_chars
+        # Whole-document extraction of at least this many pages is split into
+        # page ranges on the shared process pool; 0 disables it. Only full-text
+        # extraction and the selective strategy's keyword scan read every page;
+        # the default budget strategy stops early and always stays in-process.
+        # Workers are capped at the CPU count, as extra ones only add overhead.
+        self.parallel_min_pages = parallel_min_pages
+        self.parallel_workers = min(parallel_workers or os.cpu_count() or 1, os.cpu_count() or 1)
 
-    def extract_text(self, pdf_content: str) -> str:
-        # Convert string content back to bytes if needed
+    def open_pdf(self, pdf_content):
+        # Spooled uploads are memory-mapped; bytes are wrapped without copying
+        if hasattr(pdf_content, 'open_stream'):
+            return pdf_content.open_stream()
+        # Convert string content back to bytes if needed (older stored rows)
         if isinstance(pdf_content, str):
             pdf_content = pdf_content.encode('latin-1')
+        return io.BytesIO(pdf_content)
 
-        with io.BytesIO(pdf_content) as pdf_file:
+    def iter_page_text(self, pdf_content) -> Iterator[str]:
+        # Pages are parsed only as the caller asks for them
+        with self.open_pdf(pdf_content) as pdf_file:
             reader = PyPDF2.PdfReader(pdf_file)
-            text = ""
             for page in reader.pages:
-                text += page.extract_text() + "\n"
-        return text
+                yield page.extract_text() + "\n"
+
+    def extract_pages(self, pdf_content) -> Iterable[str]:
+        with self.open_pdf(pdf_content) as pdf_file:
+            page_count = len(PyPDF2.PdfReader(pdf_file).pages)
+        if not self.parallel_min_pages or page_count < self.parallel_min_pages or self.parallel_workers < 2:
+            # Small documents stay in-process and lazy
+            return self.iter_page_text(pdf_content)
 
-    def process(self, pdf_content: str, classification: Dict[str, Any]) -> Dict[str, Any]:
+        # Workers open the document by path: spooled uploads already have one,
+        # in-memory PDFs are written to a temporary file for the duration
+        if hasattr(pdf_content, 'path'):
+            return self.extract_pages_parallel(pdf_content.path, page_count)
+        if isinstance(pdf_content, str):
+            pdf_content = pdf_content.encode('latin-1')
+        fd, path = tempfile.mkstemp(suffix=".pdf")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(pdf_content)
+            return self.extract_pages_parallel(path, page_count)
+        finally:
+            os.remove(path)
+
+    def extract_pages_parallel(self, path: str, page_count: int) -> List[str]:
+        # A few ranges per worker so one slow range does not leave others idle
+        chunk = max(1, math.ceil(page_count / (self.parallel_workers * 2)))
+        pool = get_process_pool(self.parallel_workers)
+        futures = [pool.submit(extract_page_range, path, start, min(start + chunk, page_count))
+                   for start in range(0, page_count, chunk)]
+        pages = []
+        for future in futures:
+            pages.extend(future.result())
+        return pages
+
+    def extract_text(self, pdf_content, max_chars: Optional[int] = None) -> str:
+        if max_chars is None:
+            return "".join(self.extract_pages(pdf_content))
+
+        parts = []
+        size = 0
+        for page_text in self.iter_page_text(pdf_content):
+            parts.append(page_text)
+            size += len(page_text)
+            if size >= max_chars:
+                break
+        return "".join(parts)[:max_chars]
+
+    def select_text(self, pdf_content, max_chars: int = PROMPT_CHARS) -> str:
+        # Keyword matching has to look at every page, so extract them all up front
+        pages = self.extract_pages(pdf_content) if self.keyword_pattern is not None \
+            else self.iter_page_text(pdf_content)
+        parts = []
+        size = 0
+        for number, page_text in enumerate(pages):
+            if number < self.first_pages:
+                parts.append(page_text)
+            elif self.keyword_pattern is not None:
+                match = self.keyword_pattern.search(page_text)
+                if not match:
+                    continue
+                start = max(0, match.start() - self.snippet_chars // 2)
+                parts.append(f"[page {number + 1}] ...{page_text[start:start + self.snippet_chars]}...\n")
+            else:
+                break
+            size += len(parts[-1])
+            if size >= max_chars:
+                break
+        return "".join(parts)[:max_chars]
+
+    @timed("extract_text")
+    def prompt_text(self, pdf_content) -> str:
+        if self.text_strategy == "selective":
+            return self.select_text(pdf_content, PROMPT_CHARS)
+        return self.extract_text(pdf_content, PROMPT_CHARS)
+
+    @timed("pdf_agent")
+    def process(self, pdf_content: str, classification: Dict[str, Any],
+                use_cache: bool = True) -> Dict[str, Any]:
         try:
-            # Extract text from PDF
-            pdf_text = self.extract_text(pdf_content)
+            # Extract only as much text as the prompt can hold
+            pdf_text = self.prompt_text(pdf_content)
 
             # Analyze PDF content
             prompt = f"""
@@ -36,35 +176,28 @@ class PDFAgent:
             4. Determine document type (invoice, policy, contract, etc.)
 
             Document Text:
-            {pdf_text[:5000]}
+            {pdf_text[:PROMPT_CHARS]}
 
             Return your response in JSON format with these keys:
             document_type, fields (dict), amount_exceeds_10k (boolean), regulations_mentioned (list)
             """
 
-            response = self.model.generate_content(prompt)
-
             try:
-                # Extract JSON from response
-                response_text = response.text
-                json_start = response_text.find('{')
-                json_end = response_text.rfind('}') + 1
-                json_str = response_text[json_start:json_end]
-                analysis = json.loads(json_str)
+                analysis = self.generate_json(prompt, pdf_text[:PROMPT_CHARS], use_cache)
 
                 # Add classification and text sample
                 analysis['classification'] = classification
-                analysis['text_sample'] = pdf_text[:500]
+                analysis['text_sample'] = pdf_text[:SAMPLE_CHARS]
 
                 return analysis
             except Exception as e:
                 return {
                     "error": str(e),
-                    "text_sample": pdf_text[:500],
+                    "text_sample": pdf_text[:SAMPLE_CHARS],
                     "classification": classification
                 }
         except Exception as e:
             return {
                 "error": str(e),
                 "classification": classification
-            }
\ No newline at end of file
+            }
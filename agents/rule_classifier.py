@@ -0,0 +1,104 @@
+import json
+import re
+from typing import Dict, Any, Optional
+
+
+class RuleClassifier:
+    # Keyword/field scoring modelled on ClassifierAgent.few_shot_examples.
+    # Each matched keyword contributes its weight via noisy-OR, so a few
+    # strong signals push confidence close to 1 while a single weak one does not.
+    # Strong complaint words weigh 0.65 so any two of them ("refund" and
+    # "disappointed") clear the default 0.85 threshold, while one strong word
+    # plus a weak one (0.755) still goes to the LLM.
+    keyword_weights = {
+        "complaint": {
+            "refund": 0.65, "disappointed": 0.65, "unhappy": 0.65, "complaint": 0.65, "unacceptable": 0.65,
+            "damaged": 0.3, "delayed": 0.3, "late": 0.3, "broken": 0.3, "angry": 0.3, "elsewhere": 0.3
+        },
+        "rfq": {
+            "request for quote": 0.8, "rfq": 0.8, "request a quote": 0.8, "quotation": 0.6,
+            "quote": 0.4, "pricing": 0.3, "units of": 0.3
+        },
+        "invoice": {
+            "invoice": 0.6, "amount due": 0.6, "total due": 0.6, "bill to": 0.5,
+            "payment terms": 0.4, "due date": 0.3, "subtotal": 0.3
+        },
+        "regulation": {
+            "gdpr": 0.7, "fda": 0.7, "hipaa": 0.7, "regulation": 0.5, "regulatory": 0.5,
+            "compliance": 0.4, "directive": 0.3
+        },
+        "fraud_risk": {
+            "fraud": 0.7, "unauthorized": 0.6, "suspicious": 0.5, "chargeback": 0.5, "flagged": 0.3
+        }
+    }
+
+    def __init__(self, scan_chars: int = 5000, json_parse_chars: int = 1024 * 1024):
+        self.scan_chars = scan_chars
+        # Larger JSON payloads are scored on their text prefix instead of parsed
+        self.json_parse_chars = json_parse_chars
+        # One alternation over every keyword so the text is scanned once;
+        # longer phrases first so "request a quote" wins over "quote"
+        keywords = sorted({k for kws in self.keyword_weights.values() for k in kws}, key=len, reverse=True)
+        self.pattern = re.compile(r'\b(' + '|'.join(re.escape(k) for k in keywords) + r')\b')
+
+    def classify(self, content, input_type: str) -> Dict[str, Any]:
+        input_type = getattr(input_type, 'value', input_type)
+        if isinstance(content, (bytes, bytearray)):
+            # Only JSON small enough to parse is decoded whole; anything else
+            # (a PDF in particular) just needs the scanned prefix
+            if not (input_type == "json" and len(content) <= self.json_parse_chars):
+                content = content[:self.scan_chars]
+            content = content.decode('utf-8', errors='replace')
+        elif not isinstance(content, str):
+            # Spooled upload: only the scanned prefix is read from disk
+            content = content[:self.scan_chars].decode('latin-1')
+
+        scores = None
+        if input_type == "json" and len(content) <= self.json_parse_chars:
+            scores = self.score_json(content)
+        if scores is None:
+            scores = self.score_text(content[:self.scan_chars].lower())
+
+        ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+        intent, top = ranked[0] if ranked else ("unknown", 0.0)
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+
+        # Penalise ambiguous inputs where two intents score similarly
+        confidence = round(max(0.0, top - 0.5 * runner_up), 4)
+        return {
+            "format": input_type,
+            "intent": intent if top > 0 else "unknown",
+            "confidence": confidence,
+            "scores": {k: round(v, 4) for k, v in ranked if v > 0}
+        }
+
+    def score_text(self, text: str) -> Dict[str, float]:
+        found = set(self.pattern.findall(text))
+        scores = {}
+        for intent, keywords in self.keyword_weights.items():
+            miss = 1.0
+            for keyword in found.intersection(keywords):
+                miss *= 1.0 - keywords[keyword]
+            scores[intent] = 1.0 - miss
+        return scores
+
+    def score_json(self, content: str) -> Optional[Dict[str, float]]:
+        try:
+            data = json.loads(content)
+        except (json.JSONDecodeError, TypeError, ValueError):
+            return None
+        if not isinstance(data, dict):
+            return None
+
+        keys = {k.lower() for k in data}
+        scores = {}
+        if "transaction_id" in keys:
+            scores["fraud_risk"] = 0.95 if data.get("flagged") is True else 0.4
+        if "invoice_id" in keys:
+            scores["invoice"] = 0.8 + 0.1 * ("total" in keys) + 0.07 * ("due_date" in keys)
+        elif "total" in keys and "due_date" in keys:
+            scores["invoice"] = 0.6
+        if not scores:
+            # No structural signal; score the serialized values as text instead
+            return self.score_text(content[:self.scan_chars].lower())
+        return scores
@@ -0,0 +1,57 @@
+# Per-decision cost of the compiled action rules (action_rules.json via
+# rule_engine.RuleEngine) against the hand-written if/elif router they replaced.
+# Routing parity with that router is checked by tests/test_action_rules.py.
+#
+#   python -m benchmarks.action_rules_benchmark --decisions 200000
+import argparse
+import gc
+import itertools
+import json
+import time
+
+from action_router import DEFAULT_RULES_PATH
+from benchmarks.legacy_router import golden_cases, legacy_determine_actions
+from rule_engine import RuleEngine
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--decisions", type=int, default=200000)
+    parser.add_argument("--rules", default=DEFAULT_RULES_PATH)
+    args = parser.parse_args()
+
+    engine = RuleEngine(args.rules)
+    # Every field combination the router looks at, cycled
+    cases = golden_cases()
+    workload = list(itertools.islice(itertools.cycle(cases), args.decisions))
+    batch = [(agent_results, classification.get('intent', 'unknown')) for agent_results, classification in workload]
+    # Like timeit, keep the cyclic GC out of the timings; the batch result alone is
+    # enough allocations to trigger collections the other loops never see
+    gc.disable()
+    start = time.perf_counter()
+    for agent_results, classification in workload:
+        legacy_determine_actions(agent_results, classification)
+    legacy_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for agent_results, classification in workload:
+        engine.evaluate(agent_results, classification.get('intent', 'unknown'))
+    compiled_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    engine.evaluate_batch(batch)
+    batch_s = time.perf_counter() - start
+    gc.enable()
+
+    print(json.dumps({
+        "decisions": args.decisions,
+        "ns_per_decision": {
+            "legacy_if_elif": round(legacy_s / args.decisions * 1e9),
+            "compiled_rules": round(compiled_s / args.decisions * 1e9),
+            "compiled_batch": round(batch_s / args.decisions * 1e9)
+        }
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# The same email posted N times at once, as a retrying mailbox connector does:
+# LLM calls made and requests rows written, with and without coalescing.
+#
+#   python -m benchmarks.coalescing_benchmark --duplicates 8 --latency 0.2
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# The FakeModel replaces Gemini, so any key will do
+os.environ.setdefault("GEMINI_API_KEY", "offline")
+os.environ.setdefault("MEMORY_STORE_DB", os.path.join(tempfile.mkdtemp(), "bench.db"))
+# Every pipeline run should pay for its LLM round-trips
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+os.environ.setdefault("FAST_PATH_ENABLED", "false")
+
+import app  # noqa: E402
+from benchmarks.concurrency_benchmark import free_port, start_server  # noqa: E402
+from benchmarks.fake_model import FakeModel  # noqa: E402
+
+SAMPLE_EMAIL = "Subject: Order #{n}\nFrom: customer@example.com\n\nMy order #{n} arrived damaged. I want a refund."
+
+
+def post_process(port, content):
+    query = urllib.parse.urlencode({"input_type": "email", "content": content})
+    req = urllib.request.Request(f"http://127.0.0.1:{port}/process?{query}", method="POST")
+    with urllib.request.urlopen(req, timeout=600) as resp:
+        return json.loads(resp.read())
+
+
+def burst(port, model, content, n):
+    calls = model.calls
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        results = list(pool.map(lambda _: post_process(port, content), range(n)))
+    return {
+        "llm_calls": model.calls - calls,
+        "distinct_request_ids": len({r["request_id"] for r in results}),
+        "coalesced_responses": sum(1 for r in results if "coalesced_from" in r),
+        "same_actions": len({json.dumps(r["actions"]) for r in results}) == 1
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duplicates", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    model = FakeModel(latency=args.latency)
+    app.init_agents(model)
+    port = free_port()
+    server, thread = start_server(port)
+    try:
+        app.COALESCE_ENABLED = False
+        without = burst(port, model, SAMPLE_EMAIL.format(n=1), args.duplicates)
+        app.COALESCE_ENABLED = True
+        with_coalescing = burst(port, model, SAMPLE_EMAIL.format(n=2), args.duplicates)
+        with_coalescing["counters"] = app.coalescer.stats()
+    finally:
+        server.should_exit = True
+        thread.join()
+
+    rows = sqlite3.connect(os.environ["MEMORY_STORE_DB"]).execute("SELECT COUNT(*) FROM requests").fetchone()[0]
+    print(json.dumps({"duplicates": args.duplicates, "without_coalescing": without,
+                      "with_coalescing": with_coalescing, "requests_rows": rows}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# Fires N parallel /process calls at a live uvicorn server backed by a FakeModel
+# and compares a single-worker executor (equivalent to the old inline blocking
+# calls) against the configured agent pool.
+#
+#   python -m benchmarks.concurrency_benchmark --latency 0.2 --requests 1 8 32
+import argparse
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# The FakeModel replaces Gemini, so any key will do
+os.environ.setdefault("GEMINI_API_KEY", "offline")
+os.environ.setdefault("MEMORY_STORE_DB", os.path.join(tempfile.mkdtemp(), "bench.db"))
+# Every request should pay for its LLM round-trips
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+os.environ.setdefault("FAST_PATH_ENABLED", "false")
+os.environ.setdefault("COALESCE_ENABLED", "false")
+
+import uvicorn  # noqa: E402
+
+import app  # noqa: E402
+from benchmarks.fake_model import FakeModel  # noqa: E402
+
+SAMPLE_EMAIL = open(os.path.join(os.path.dirname(__file__), "..", "samples", "complaint_email.txt")).read()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port):
+    server = uvicorn.Server(uvicorn.Config(app.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+def post_process(port, content):
+    query = urllib.parse.urlencode({"input_type": "email", "content": content})
+    req = urllib.request.Request(f"http://127.0.0.1:{port}/process?{query}", method="POST")
+    with urllib.request.urlopen(req, timeout=600) as resp:
+        return json.loads(resp.read())
+
+
+def run_burst(port, n):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        results = list(pool.map(lambda _: post_process(port, SAMPLE_EMAIL), range(n)))
+    assert all(r["actions"] for r in results)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.2, help="fake LLM latency per call (s)")
+    parser.add_argument("--requests", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    app.init_agents(FakeModel(latency=args.latency))
+    port = free_port()
+    server, thread = start_server(port)
+
+    # Each /process makes two sequential LLM calls (classify + agent)
+    round_trip = 2 * args.latency
+    report = []
+    try:
+        for label, workers in (("inline", 1), ("pooled", app.AGENT_WORKERS)):
+            app.agent_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="agent-worker")
+            for n in args.requests:
+                elapsed = run_burst(port, n)
+                report.append({
+                    "mode": label,
+                    "workers": workers,
+                    "parallel_requests": n,
+                    "wall_seconds": round(elapsed, 3),
+                    "round_trips": round(elapsed / round_trip, 2)
+                })
+    finally:
+        server.should_exit = True
+        thread.join()
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
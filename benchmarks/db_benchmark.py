@@ -0,0 +1,72 @@
+# Writes per second for the per-stage commit pattern /process used to issue,
+# comparing a fresh default-journal sqlite3.connect per write with the pooled
+# WAL connections from db_pool.py.
+#
+#   python -m benchmarks.db_benchmark --writes 2000 --threads 1 8
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from db_pool import ConnectionPool
+from init_database import init_db
+
+
+def write_one(get_conn):
+    conn = get_conn()
+    try:
+        conn.execute('''
+            INSERT INTO requests (request_id, raw_input, input_type, timestamp)
+            VALUES (?, ?, ?, ?)
+        ''', (str(uuid.uuid4()), "x" * 512, "email", "2024-01-01T00:00:00"))
+        conn.commit()
+        return 0
+    except sqlite3.OperationalError as e:
+        if "locked" in str(e):
+            return 1
+        raise
+    finally:
+        conn.close()
+
+
+def run(get_conn, writes, threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        locked = sum(pool.map(lambda _: write_one(get_conn), range(writes)))
+    elapsed = time.perf_counter() - start
+    return {"writes_per_second": round((writes - locked) / elapsed, 1), "locked_errors": locked}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writes", type=int, default=2000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8])
+    args = parser.parse_args()
+
+    report = []
+    for threads in args.threads:
+        workdir = tempfile.mkdtemp()
+
+        before_path = os.path.join(workdir, "before.db")
+        init_db(before_path)
+        # The old get_db_conn: new connection, default timeout and journal per call
+        before = run(lambda: sqlite3.connect(before_path), args.writes, threads)
+
+        after_path = os.path.join(workdir, "after.db")
+        init_db(after_path)
+        pool = ConnectionPool(after_path, size=threads)
+        after = run(pool.connection, args.writes, threads)
+        pool.close_all()
+
+        report.append({"threads": threads, "writes": args.writes, "before": before, "after": after,
+                       "speedup": round(after["writes_per_second"] / max(before["writes_per_second"], 1e-9), 2)})
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
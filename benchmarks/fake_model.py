@@ -0,0 +1,123 @@
+import json
+import math
+import random
+import threading
+import time
+
+
+CANNED_RESPONSES = {
+    "classifier": {"format": "email", "intent": "complaint", "confidence": 0.9},
+    "email": {
+        "sender": {"name": "Angry Customer", "email": "customer@example.com"},
+        "urgency": "high",
+        "issue": "Order arrived late and damaged",
+        "tone": "angry",
+        "is_escalation": True
+    },
+    "json": {"valid": True, "anomalies": [], "field_types": {}, "required_fields_missing": []},
+    "pdf": {
+        "document_type": "invoice",
+        "fields": {"invoice_number": "INV-1", "total": 15000},
+        "amount_exceeds_10k": True,
+        "regulations_mentioned": []
+    }
+}
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeRateLimitError(Exception):
+    # Shaped like google.api_core.exceptions.ResourceExhausted
+    code = 429
+
+
+class FakeModel:
+    # Stand-in for genai.GenerativeModel: blocks for `latency` seconds like the
+    # real synchronous client and answers with canned JSON per prompt kind.
+    # distribution shapes the per-call latency around that value:
+    #   fixed     - always `latency`
+    #   uniform   - latency * (1 +/- spread)
+    #   lognormal - median `latency`, sigma `spread` (a long tail like real APIs)
+    # error_rate injects random 429s; capacity makes every call beyond that many
+    # concurrent ones fail with a 429, like a provider quota. malformed_rate wraps
+    # the reply in a markdown fence followed by prose containing a stray brace.
+    distributions = ("fixed", "uniform", "lognormal")
+
+    def __init__(self, latency=0.2, responses=None, model_name="models/fake-gemini", error_rate=0.0,
+                 capacity=None, seed=None, distribution="fixed", spread=0.5, malformed_rate=0.0):
+        if distribution not in self.distributions:
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        self.latency = latency
+        self.distribution = distribution
+        self.spread = spread
+        self.malformed_rate = malformed_rate
+        self.malformed = 0
+        self.responses = dict(CANNED_RESPONSES, **(responses or {}))
+        self.model_name = model_name
+        self.error_rate = error_rate
+        self.capacity = capacity
+        self.random = random.Random(seed)
+        self.calls = 0
+        self.errors = 0
+        self.inflight = 0
+        self._lock = threading.Lock()
+
+    def sample_latency(self):
+        # Called with the lock held, so a seeded run draws the same sequence
+        if self.distribution == "uniform":
+            return max(0.0, self.latency * (1 + self.random.uniform(-self.spread, self.spread)))
+        if self.distribution == "lognormal":
+            return self.latency * math.exp(self.random.gauss(0, self.spread))
+        return self.latency
+
+    def prompt_kind(self, prompt):
+        if '"classification": an object with keys' in prompt:
+            return "fused"
+        if "keys: format, intent, confidence" in prompt:
+            return "classifier"
+        if "Analyze the following email" in prompt:
+            return "email"
+        if "Analyze the following JSON data" in prompt or "free-text fields come from a structured JSON" in prompt:
+            return "json"
+        if "Analyze the following document text" in prompt:
+            return "pdf"
+        return "classifier"
+
+    def generate_content(self, prompt, **kwargs):
+        with self._lock:
+            self.calls += 1
+            rejected = (self.capacity is not None and self.inflight >= self.capacity) or \
+                (self.error_rate and self.random.random() < self.error_rate)
+            if rejected:
+                self.errors += 1
+            else:
+                self.inflight += 1
+            latency = self.sample_latency()
+            malformed = not rejected and self.malformed_rate and self.random.random() < self.malformed_rate
+            if malformed:
+                self.malformed += 1
+        if rejected:
+            time.sleep(latency / 10)
+            raise FakeRateLimitError("429 Resource has been exhausted (e.g. check quota).")
+        try:
+            time.sleep(latency)
+        finally:
+            with self._lock:
+                self.inflight -= 1
+        kind = self.prompt_kind(prompt)
+        payload = self.fused_response(prompt) if kind == "fused" else self.responses[kind]
+        text = json.dumps(payload)
+        if malformed:
+            text = f"```json\n{text}\n```\nNote: fields not present in the input were left out {{see above}}."
+        return FakeResponse(text)
+
+    def fused_response(self, prompt):
+        extraction = "email"
+        if "free-text values of the JSON data" in prompt:
+            extraction = "json"
+        elif "Analyze the input as document text" in prompt:
+            extraction = "pdf"
+        return {"classification": self.responses["classifier"], "extraction": self.responses[extraction]}
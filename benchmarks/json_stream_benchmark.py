@@ -0,0 +1,75 @@
+# Peak Python heap (tracemalloc) and wall time for analysing one large JSON
+# export: the old json.loads + json.dumps(indent=2) preview versus the
+# streaming reader, which keeps a bounded summary and validates record by record.
+#
+#   python -m benchmarks.json_stream_benchmark --records 200000
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from agents.json_agent import JSONAgent
+from uploads import SpooledUpload
+
+
+def make_export(path: str, records: int, seed: int = 7):
+    rng = random.Random(seed)
+    with open(path, "w") as f:
+        f.write("[")
+        for i in range(records):
+            if i:
+                f.write(",")
+            f.write(json.dumps({
+                "transaction_id": f"TX-{i:08d}",
+                "amount": round(rng.uniform(1, 20000), 2),
+                "currency": "USD",
+                "timestamp": "2024-01-%02dT10:00:00Z" % (i % 28 + 1),
+                "flagged": rng.random() < 0.01,
+                "merchant": {"id": rng.randint(1, 5000), "country": rng.choice(["US", "DE", "BR", "IN"])}
+            }))
+        f.write("]")
+
+
+def old_path(path):
+    with open(path) as f:
+        content = f.read()
+    data = json.loads(content)
+    return json.dumps(data, indent=2)[:5000]
+
+
+def stream_path(path):
+    agent = JSONAgent(None, None, stream_threshold_bytes=0)
+    return agent.process(SpooledUpload(path), {"intent": "fraud_risk"})
+
+
+def measure(func, path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {"peak_mb": round(peak / (1024 * 1024), 2), "seconds": round(elapsed, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=200000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "export.json")
+    make_export(path, args.records)
+    print(json.dumps({
+        "records": args.records,
+        "file_mb": round(os.path.getsize(path) / (1024 * 1024), 2),
+        "loads_and_dumps": measure(old_path, path),
+        "streaming": measure(stream_path, path)
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# The hand-written if/elif router that action_rules.json replaced, kept as the
+# reference for tests/test_action_rules.py and the timing comparison in
+# benchmarks/action_rules_benchmark.py.
+import itertools
+
+
+LEGACY_ACTION_MAP = {
+    "complaint": {"high": "escalate_to_crm", "medium": "create_ticket", "low": "log_and_close"},
+    "invoice": {"amount_exceeds_10k": "flag_for_review", "default": "process_payment"},
+    "fraud_risk": {"default": "alert_security_team"},
+    "regulation": {"GDPR": "notify_compliance_gdpr", "FDA": "notify_compliance_fda", "default": "log_regulation"}
+}
+
+
+def legacy_determine_actions(agent_results, classification):
+    intent = classification.get('intent', 'unknown')
+    actions = []
+    if intent in LEGACY_ACTION_MAP:
+        intent_actions = LEGACY_ACTION_MAP[intent]
+        if intent == "complaint":
+            urgency = agent_results.get('urgency', 'medium')
+            tone = agent_results.get('tone', 'neutral')
+            if tone in ['angry', 'threatening'] or urgency == 'high':
+                actions.append(intent_actions['high'])
+            elif urgency == 'medium':
+                actions.append(intent_actions['medium'])
+            else:
+                actions.append(intent_actions['low'])
+        elif intent == "invoice":
+            if agent_results.get('fields', {}).get('total', 0) > 10000:
+                actions.append(intent_actions['amount_exceeds_10k'])
+            else:
+                actions.append(intent_actions['default'])
+        elif intent == "fraud_risk":
+            actions.append(intent_actions['default'])
+        elif intent == "regulation":
+            regulations = agent_results.get('regulations_mentioned', [])
+            if regulations:
+                for reg in regulations:
+                    if reg in intent_actions:
+                        actions.append(intent_actions[reg])
+                    else:
+                        actions.append(intent_actions['default'])
+            else:
+                actions.append(intent_actions['default'])
+    return actions
+
+
+def golden_cases():
+    # Every combination of the fields the router looks at, including missing keys
+    missing = object()
+    urgencies = [missing, None, "low", "medium", "high", "HIGH"]
+    tones = [missing, "polite", "neutral", "angry", "threatening"]
+    totals = [missing, 0, 9999.99, 10000, 10000.01, 250000]
+    regulations = [missing, [], ["GDPR"], ["FDA"], ["HIPAA"], ["GDPR", "FDA", "SOX"], ["default"]]
+    intents = ["complaint", "invoice", "fraud_risk", "regulation", "rfq", "unknown"]
+
+    cases = []
+    for intent, urgency, tone, total, regs in itertools.product(intents, urgencies, tones, totals, regulations):
+        results = {}
+        if urgency is not missing:
+            results["urgency"] = urgency
+        if tone is not missing:
+            results["tone"] = tone
+        if total is not missing:
+            results["fields"] = {"total": total}
+        if regs is not missing:
+            results["regulations_mentioned"] = regs
+        cases.append((results, {"intent": intent}))
+    cases.append(({}, {}))
+    return cases
@@ -0,0 +1,87 @@
+# Burst of classification calls against a fake model with a provider-style
+# quota (calls beyond --capacity concurrent ones get a 429), with and without
+# the LLM gateway, followed by a hard outage to show the circuit breaker.
+#
+#   python -m benchmarks.llm_gateway_benchmark --clients 64 --calls 8 --capacity 8
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from agents.classifier_agent import ClassifierAgent
+from agents.rule_classifier import RuleClassifier
+from benchmarks.fake_model import FakeModel
+from init_database import init_db
+from llm_gateway import LLMGateway
+
+COMPLAINT = "Subject: Order\n\nMy order arrived late. Please advise on next steps."
+
+
+def burst(classifier, clients: int, calls: int):
+    outcomes = {"llm": 0, "rules_fallback": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def client(n):
+        for i in range(calls):
+            try:
+                # Distinct text per call so nothing is served from a cache
+                result = classifier.classify(f"{COMPLAINT} ref {n}-{i}", "email", use_cache=False)
+                key = result.get('source', 'llm')
+            except Exception:
+                key = "errors"
+            with lock:
+                outcomes[key] = outcomes.get(key, 0) + 1
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    outcomes["seconds"] = round(time.perf_counter() - start, 2)
+    return outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--calls", type=int, default=8)
+    parser.add_argument("--capacity", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    # Every fallback logs a warning; thousands of them would bury the report
+    logging.disable(logging.WARNING)
+    db_path = os.path.join(tempfile.mkdtemp(), "gateway.db")
+    init_db(db_path)
+
+    def get_db_conn():
+        return sqlite3.connect(db_path, timeout=30)
+
+    raw_model = FakeModel(args.latency, capacity=args.capacity)
+    raw = burst(ClassifierAgent(raw_model, get_db_conn, None, RuleClassifier(), 1.1), args.clients, args.calls)
+    raw["provider_429s"] = raw_model.errors
+
+    model = FakeModel(args.latency, capacity=args.capacity)
+    gateway = LLMGateway(model, max_concurrency=32, queue_timeout=30, decrease_interval=args.latency)
+    gated = burst(ClassifierAgent(gateway, get_db_conn, None, RuleClassifier(), 1.1), args.clients, args.calls)
+    gated["provider_429s"] = model.errors
+    gated["gateway"] = gateway.stats()
+
+    # Provider down: every call fails; the breaker should turn them into fast fallbacks
+    outage_model = FakeModel(args.latency, error_rate=1.0)
+    outage_gateway = LLMGateway(outage_model, max_concurrency=32, min_concurrency=32, breaker_threshold=5,
+                                breaker_cooldown=60)
+    outage = burst(ClassifierAgent(outage_gateway, get_db_conn, None, RuleClassifier(), 1.1), args.clients, args.calls)
+    outage["provider_calls"] = outage_model.calls
+    outage["gateway"] = outage_gateway.stats()
+
+    print(json.dumps({"without_gateway": raw, "with_gateway": gated, "outage_with_breaker": outage}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# Prompt-text extraction time on synthetic PDFs: the old parse-every-page
+# string concatenation versus the budgeted and selective extractors.
+#
+#   python -m benchmarks.pdf_benchmark --pages 10 100 400
+import argparse
+import io
+import json
+import time
+
+import PyPDF2
+
+from agents.pdf_agent import PDFAgent, PROMPT_CHARS
+from benchmarks.synthetic_pdf import make_pdf
+
+
+def extract_all_concat(pdf_bytes):
+    # Previous PDFAgent.extract_text
+    with io.BytesIO(pdf_bytes) as pdf_file:
+        reader = PyPDF2.PdfReader(pdf_file)
+        text = ""
+        for page in reader.pages:
+            text += page.extract_text() + "\n"
+    return text[:PROMPT_CHARS]
+
+
+def timed(func, *args, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best * 1000, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 400])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    budget = PDFAgent(None, None)
+    selective = PDFAgent(None, None, text_strategy="selective")
+    report = []
+    for pages in args.pages:
+        pdf_bytes = make_pdf(pages, keyword_every=50)
+        report.append({
+            "pages": pages,
+            "bytes": len(pdf_bytes),
+            "full_parse_ms": timed(extract_all_concat, pdf_bytes, repeat=args.repeat),
+            "budget_ms": timed(budget.prompt_text, pdf_bytes, repeat=args.repeat),
+            "selective_ms": timed(selective.prompt_text, pdf_bytes, repeat=args.repeat)
+        })
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+# Replays historical traffic from a memory_store.db through the pipeline and
+# reports throughput, latency percentiles and routing drift: replayed `actions`
+# that differ from the ones stored for the same request. The source database is
+# opened read-only; replayed requests are written to a scratch database.
+#
+# --model recorded answers each LLM prompt with the classification/agent_results
+# stored for that row, so drift reflects changes in local logic (rules, parsing,
+# validation). --model fake uses FakeModel for load tests of real input shapes.
+#
+#   python -m benchmarks.replay --source memory_store.db --model recorded
+#   python -m benchmarks.replay --model fake --latency 0.2 --rate 20 --concurrency 32
+#   python -m benchmarks.replay --time-scale 60 --input-type email
+import argparse
+import contextvars
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# The FakeModel replaces Gemini, so any key will do
+os.environ.setdefault("GEMINI_API_KEY", "offline")
+os.environ.setdefault("MEMORY_STORE_DB", os.path.join(tempfile.mkdtemp(), "replay.db"))
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+os.environ.setdefault("COALESCE_ENABLED", "false")
+
+import app  # noqa: E402
+from benchmarks.fake_model import FakeModel, FakeResponse  # noqa: E402
+from benchmarks.suite import latency_summary  # noqa: E402
+from uploads import SpooledUpload  # noqa: E402
+
+# The stored row being replayed on this thread (and the threads it fans out to)
+current_row = contextvars.ContextVar("current_row", default=None)
+
+
+class RecordedModel(FakeModel):
+    # Answers with what the model said the first time, as far as the stored row
+    # tells: the classification for classifier prompts and agent_results for the
+    # extraction prompts. Rows without a recording get the canned replies.
+    def generate_content(self, prompt, **kwargs):
+        row = current_row.get()
+        if row is None or not row["classification"]:
+            return super().generate_content(prompt, **kwargs)
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        classification = row["classification"]
+        extraction = {k: v for k, v in (row["agent_results"] or {}).items() if k != "classification"}
+        kind = self.prompt_kind(prompt)
+        if kind == "classifier":
+            return FakeResponse(json.dumps(classification))
+        if kind == "fused":
+            return FakeResponse(json.dumps({"classification": classification, "extraction": extraction}))
+        return FakeResponse(json.dumps(extraction))
+
+
+def load_json(value):
+    if value is None:
+        return None
+    try:
+        return json.loads(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def iter_rows(source, input_type=None, since=None, limit=None, batch=500):
+    # Streams rows oldest first; older databases lack raw_input_ref
+    conn = sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+    try:
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(requests)")}
+        ref = "raw_input_ref" if "raw_input_ref" in columns else "NULL"
+        clauses, params = [], []
+        if input_type:
+            clauses.append("input_type = ?")
+            params.append(input_type)
+        if since:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        cursor = conn.execute(f'''
+            SELECT request_id, raw_input, {ref}, input_type, timestamp, classification, agent_results, actions
+            FROM requests {where} ORDER BY timestamp, request_id {"LIMIT ?" if limit else ""}
+        ''', params + ([limit] if limit else []))
+        while True:
+            rows = cursor.fetchmany(batch)
+            if not rows:
+                return
+            for request_id, raw_input, raw_input_ref, row_type, timestamp, classification, agent_results, actions \
+                    in rows:
+                yield {
+                    "request_id": request_id,
+                    "raw_input": raw_input,
+                    "raw_input_ref": raw_input_ref,
+                    "input_type": row_type,
+                    "timestamp": timestamp,
+                    "classification": load_json(classification),
+                    "agent_results": load_json(agent_results),
+                    "actions": load_json(actions)
+                }
+    finally:
+        conn.close()
+
+
+def row_content(row):
+    # Inputs are replayed the way /process would have passed them on
+    if row["raw_input_ref"]:
+        return SpooledUpload(row["raw_input_ref"]) if os.path.exists(row["raw_input_ref"]) else None
+    raw = row["raw_input"]
+    if raw is None:
+        return None
+    if row["input_type"] == "pdf":
+        return raw if isinstance(raw, bytes) else raw.encode('latin-1')
+    return raw.decode('utf-8', errors='replace') if isinstance(raw, bytes) else raw
+
+
+def parse_timestamp(value):
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+class Replay:
+    def __init__(self, mode=None, concurrency=8, rate=0.0, time_scale=0.0, max_drift_samples=20):
+        self.mode = mode
+        self.concurrency = concurrency
+        self.rate = rate
+        self.time_scale = time_scale
+        self.max_drift_samples = max_drift_samples
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.lags = []
+        self.errors = Counter()
+        self.skipped = Counter()
+        self.compared = Counter()
+        self.drifted = Counter()
+        self.intent_drift = 0
+        self.drift_samples = []
+
+    def run_row(self, row, content, scheduled):
+        lag = max(0.0, time.perf_counter() - scheduled) if scheduled is not None else None
+        input_type = app.InputType(row["input_type"])
+        token = current_row.set(row)
+        start = time.perf_counter()
+        try:
+            response = app.run_pipeline(row["request_id"], content, input_type, True, self.mode)
+            error = None
+        except Exception as e:
+            response, error = None, type(e).__name__
+        finally:
+            current_row.reset(token)
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            if lag is not None:
+                self.lags.append(lag)
+            if error:
+                self.errors[row["input_type"]] += 1
+                return
+            self.latencies[row["input_type"]].append(elapsed)
+            if row["actions"] is None:
+                return
+            self.compared[row["input_type"]] += 1
+            stored_intent = (row["classification"] or {}).get("intent")
+            replayed_intent = (response.get("classification") or {}).get("intent")
+            if stored_intent != replayed_intent:
+                self.intent_drift += 1
+            if response.get("actions") != row["actions"]:
+                self.drifted[row["input_type"]] += 1
+                if len(self.drift_samples) < self.max_drift_samples:
+                    self.drift_samples.append({
+                        "request_id": row["request_id"],
+                        "input_type": row["input_type"],
+                        "stored_intent": stored_intent,
+                        "replayed_intent": replayed_intent,
+                        "stored_actions": row["actions"],
+                        "replayed_actions": response.get("actions")
+                    })
+
+    def run(self, rows):
+        # Bounded hand-off, so a large database is streamed rather than queued up
+        slots = threading.BoundedSemaphore(self.concurrency * 2)
+        input_types = {t.value for t in app.InputType}
+        first_ts = None
+        submitted = 0
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="replay") as pool:
+            for row in rows:
+                content = row_content(row)
+                if content is None or row["input_type"] not in input_types:
+                    self.skipped[row["input_type"]] += 1
+                    continue
+                scheduled = None
+                if self.rate:
+                    scheduled = start + submitted / self.rate
+                elif self.time_scale:
+                    ts = parse_timestamp(row["timestamp"])
+                    if ts is not None:
+                        first_ts = ts if first_ts is None else first_ts
+                        scheduled = start + (ts - first_ts) / self.time_scale
+                if scheduled is not None:
+                    delay = scheduled - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                slots.acquire()
+                future = pool.submit(self.run_row, row, content, scheduled)
+                future.add_done_callback(lambda _: slots.release())
+                submitted += 1
+        return submitted, time.perf_counter() - start
+
+    def report(self, submitted, elapsed):
+        all_latencies = [value for values in self.latencies.values() for value in values]
+        compared = sum(self.compared.values())
+        drifted = sum(self.drifted.values())
+        by_type = {}
+        for input_type in sorted(set(self.latencies) | set(self.errors) | set(self.compared)):
+            by_type[input_type] = dict({
+                "completed": len(self.latencies[input_type]),
+                "errors": self.errors[input_type],
+                "compared": self.compared[input_type],
+                "action_drift": self.drifted[input_type]
+            }, **latency_summary(self.latencies[input_type]))
+        report = {
+            "submitted": submitted,
+            "skipped": dict(self.skipped),
+            "completed": len(all_latencies),
+            "errors": sum(self.errors.values()),
+            "wall_seconds": round(elapsed, 3),
+            "throughput_rps": round(len(all_latencies) / elapsed, 2) if elapsed else None,
+            "latency": latency_summary(all_latencies),
+            "by_input_type": by_type,
+            "drift": {
+                "compared": compared,
+                "actions_changed": drifted,
+                "action_drift_rate": round(drifted / compared, 4) if compared else None,
+                "intent_changed": self.intent_drift,
+                "samples": self.drift_samples
+            }
+        }
+        if self.lags:
+            # How far behind schedule requests started; a growing lag means the
+            # pipeline could not keep up with the requested rate
+            report["schedule_lag"] = latency_summary(self.lags)
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--source", default="memory_store.db", help="database to replay (opened read-only)")
+    parser.add_argument("--model", choices=("recorded", "fake"), default="recorded")
+    parser.add_argument("--latency", type=float, default=0.0, help="per-call model latency (s)")
+    parser.add_argument("--distribution", choices=FakeModel.distributions, default="fixed")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mode", choices=[m.value for m in app.PipelineMode], default=None)
+    parser.add_argument("--concurrency", type=int, default=8)
+    pacing = parser.add_mutually_exclusive_group()
+    pacing.add_argument("--rate", type=float, default=0.0, help="requests per second (default: as fast as possible)")
+    pacing.add_argument("--time-scale", type=float, default=0.0,
+                        help="replay the recorded arrival times, sped up by this factor")
+    parser.add_argument("--input-type", choices=[t.value for t in app.InputType])
+    parser.add_argument("--since", help="only rows with timestamp >= this ISO timestamp")
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--output", help="also write the report to this file")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.source):
+        raise SystemExit(f"{args.source} does not exist")
+    model_class = RecordedModel if args.model == "recorded" else FakeModel
+    app.init_agents(model_class(latency=args.latency, distribution=args.distribution, error_rate=args.error_rate,
+                                seed=args.seed))
+
+    replay = Replay(app.PipelineMode(args.mode) if args.mode else None, args.concurrency, args.rate,
+                    args.time_scale)
+    try:
+        submitted, elapsed = replay.run(iter_rows(args.source, args.input_type, args.since, args.limit))
+    finally:
+        app.action_executor.close()
+        app.request_store.close()
+
+    report = dict(replay.report(submitted, elapsed), source=args.source, model=args.model,
+                  args={k: v for k, v in vars(args).items() if k not in ("source", "model", "output")})
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
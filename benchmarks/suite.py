@@ -0,0 +1,271 @@
+# Offline benchmark suite: end-to-end /process load per input type against a
+# live uvicorn server backed by a FakeModel, plus micro-benchmarks for the
+# action router, PDF text extraction and request writes. Prints one JSON
+# document; pass an earlier one as --baseline to get per-metric ratios.
+#
+#   python -m benchmarks.suite --requests 200 --concurrency 16 --latency 0.05 \
+#       --distribution lognormal --output results.json
+#   python -m benchmarks.suite --baseline results.json
+import argparse
+import json
+import math
+import os
+import platform
+import tempfile
+import time
+import urllib.parse
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# The FakeModel replaces Gemini, so any key will do
+os.environ.setdefault("GEMINI_API_KEY", "offline")
+os.environ.setdefault("MEMORY_STORE_DB", os.path.join(tempfile.mkdtemp(), "bench.db"))
+# Every request should pay for its LLM round-trips
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+os.environ.setdefault("FAST_PATH_ENABLED", "false")
+os.environ.setdefault("COALESCE_ENABLED", "false")
+
+import app  # noqa: E402
+from action_router import ActionRouter  # noqa: E402
+from agents.json_extract import extraction_stats  # noqa: E402
+from agents.pdf_agent import PDFAgent, PROMPT_CHARS  # noqa: E402
+from benchmarks.concurrency_benchmark import free_port, start_server  # noqa: E402
+from benchmarks.fake_model import FakeModel  # noqa: E402
+from benchmarks.synthetic_pdf import make_pdf  # noqa: E402
+from db_pool import ConnectionPool  # noqa: E402
+from init_database import init_db  # noqa: E402
+from persistence import RequestRecord, RequestStore  # noqa: E402
+
+SAMPLES_DIR = os.path.join(os.path.dirname(__file__), "..", "samples")
+
+
+def load_inputs(pdf_pages):
+    # samples/ has no PDF, so the PDF input is a synthetic invoice of pdf_pages pages
+    with open(os.path.join(SAMPLES_DIR, "complaint_email.txt"), "rb") as f:
+        email = f.read()
+    with open(os.path.join(SAMPLES_DIR, "invoice.json"), "rb") as f:
+        invoice = f.read()
+    return {
+        "email": ("complaint_email.txt", "text/plain", email),
+        "json": ("invoice.json", "application/json", invoice),
+        "pdf": ("invoice.pdf", "application/pdf", make_pdf(pdf_pages, keyword_every=5))
+    }
+
+
+def percentile(sorted_values, pct):
+    # Nearest rank
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def latency_summary(latencies):
+    values = sorted(latencies)
+    return {f"p{pct}_ms": round(percentile(values, pct) * 1000, 3) if values else None for pct in (50, 90, 99)}
+
+
+def post_file(port, input_type, filename, content_type, payload):
+    boundary = uuid.uuid4().hex
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{filename}\"\r\n"
+            f"Content-Type: {content_type}\r\n\r\n").encode() + payload + f"\r\n--{boundary}--\r\n".encode()
+    query = urllib.parse.urlencode({"input_type": input_type})
+    req = urllib.request.Request(f"http://127.0.0.1:{port}/process?{query}", data=body, method="POST",
+                                 headers={"Content-Type": f"multipart/form-data; boundary={boundary}"})
+    with urllib.request.urlopen(req, timeout=600) as resp:
+        return json.loads(resp.read())
+
+
+def bench_process(port, input_type, sample, requests, concurrency):
+    def one(_):
+        start = time.perf_counter()
+        try:
+            post_file(port, input_type, *sample)
+            return time.perf_counter() - start, None
+        except Exception as e:
+            return time.perf_counter() - start, str(e)
+
+    # One untimed request warms the pools and imports
+    one(0)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(requests)))
+    elapsed = time.perf_counter() - start
+    latencies = [latency for latency, error in results if error is None]
+    return dict({
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": sum(1 for _, error in results if error is not None),
+        "throughput_rps": round(len(latencies) / elapsed, 2)
+    }, **latency_summary(latencies))
+
+
+def per_op(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def bench_action_router(db_path, repeat):
+    router = ActionRouter(ConnectionPool(db_path, 4).connection)
+    cases = [
+        ({"urgency": "high", "tone": "angry"}, {"intent": "complaint"}),
+        ({"fields": {"total": 25000}}, {"intent": "invoice"}),
+        ({"regulations_mentioned": ["GDPR", "FDA", "SOX"]}, {"intent": "regulation"}),
+        ({}, {"intent": "rfq"})
+    ]
+    record = RequestRecord("bench", "", "email")
+
+    def determine():
+        for agent_results, classification in cases:
+            router.determine_actions(agent_results, classification, record)
+        record.action_logs.clear()
+
+    def execute():
+        # Fresh request ids, so every call runs instead of being deduplicated
+        router.execute_actions(["create_ticket", "log_and_close"], request_id=str(uuid.uuid4()))
+
+    result = {
+        "determine_actions_us": round(per_op(determine, repeat) / len(cases) * 1e6, 3),
+        "execute_actions_us": round(per_op(execute, max(1, repeat // 20)) * 1e6, 3)
+    }
+    router.executor.close()
+    return result
+
+
+def bench_pdf_extract(pages_list, repeat):
+    agent = PDFAgent(None, None, parallel_min_pages=0)
+    result = {}
+    for pages in pages_list:
+        pdf = make_pdf(pages, keyword_every=5)
+        result[f"{pages}_pages"] = {
+            "prompt_budget_ms": round(min(per_op(lambda: agent.extract_text(pdf, PROMPT_CHARS), 1)
+                                          for _ in range(repeat)) * 1000, 3),
+            "full_text_ms": round(min(per_op(lambda: agent.extract_text(pdf), 1)
+                                      for _ in range(repeat)) * 1000, 3)
+        }
+    return result
+
+
+def bench_db_writes(workdir, records, batch_size):
+    def make_records(count):
+        rows = []
+        for _ in range(count):
+            record = RequestRecord(str(uuid.uuid4()), "x" * 512, "email")
+            record.classification = {"format": "email", "intent": "complaint"}
+            record.agent_results = {"urgency": "high"}
+            record.actions = ["escalate_to_crm"]
+            record.action_results = {"escalate_to_crm": {"status": "success"}}
+            record.status = "done"
+            record.add_classification("x" * 200, record.classification)
+            record.add_action_log("complaint", record.actions)
+            record.timings = [("classify", 0.0, 1.0), ("email_agent", 1.0, 1.0)]
+            rows.append(record)
+        return rows
+
+    result = {}
+    for label, size in (("per_request", 1), ("batched", batch_size)):
+        db_path = os.path.join(workdir, f"writes_{label}.db")
+        init_db(db_path)
+        pool = ConnectionPool(db_path, 4)
+        store = RequestStore(pool.connection)
+        pending = make_records(records)
+        start = time.perf_counter()
+        for i in range(0, records, size):
+            store.flush(pending[i:i + size])
+        elapsed = time.perf_counter() - start
+        pool.close_all()
+        result[label] = {"records_per_second": round(records / elapsed, 1), "transactions": store.transactions}
+    return result
+
+
+def flatten(value, prefix=""):
+    if isinstance(value, dict):
+        items = {}
+        for key, inner in value.items():
+            items.update(flatten(inner, f"{prefix}.{key}" if prefix else key))
+        return items
+    return {prefix: value} if isinstance(value, (int, float)) and not isinstance(value, bool) else {}
+
+
+def compare(results, baseline):
+    # current / baseline for every numeric metric both runs have
+    current, previous = (flatten({k: v for k, v in run.items() if k not in ("meta", "vs_baseline")})
+                         for run in (results, baseline))
+    return {key: round(current[key] / previous[key], 3)
+            for key in sorted(current) if key in previous and previous[key]}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200, help="/process calls per input type")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.05, help="median fake LLM latency per call (s)")
+    parser.add_argument("--distribution", choices=FakeModel.distributions, default="lognormal")
+    parser.add_argument("--spread", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="share of replies wrapped in prose")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--input-types", nargs="+", default=["email", "json", "pdf"])
+    parser.add_argument("--pdf-pages", type=int, default=10)
+    parser.add_argument("--micro-repeat", type=int, default=2000)
+    parser.add_argument("--db-records", type=int, default=2000)
+    parser.add_argument("--skip-process", action="store_true")
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--output", help="also write the results to this file")
+    parser.add_argument("--baseline", help="results file from an earlier run to compare against")
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")}
+        }
+    }
+
+    if not args.skip_process:
+        model = FakeModel(latency=args.latency, distribution=args.distribution, spread=args.spread,
+                          error_rate=args.error_rate, malformed_rate=args.malformed_rate, seed=args.seed)
+        app.init_agents(model)
+        inputs = load_inputs(args.pdf_pages)
+        port = free_port()
+        server, thread = start_server(port)
+        try:
+            results["process"] = {input_type: bench_process(port, input_type, inputs[input_type], args.requests,
+                                                            args.concurrency)
+                                  for input_type in args.input_types}
+        finally:
+            server.should_exit = True
+            thread.join()
+        results["process"]["llm_calls"] = model.calls
+        results["process"]["llm_json"] = extraction_stats.stats()
+
+    if not args.skip_micro:
+        workdir = tempfile.mkdtemp()
+        router_db = os.path.join(workdir, "router.db")
+        init_db(router_db)
+        results["micro"] = {
+            "action_router": bench_action_router(router_db, args.micro_repeat),
+            "pdf_extract_text": bench_pdf_extract([10, 100], 3),
+            "db_writes": bench_db_writes(workdir, args.db_records, 50)
+        }
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            results["vs_baseline"] = compare(results, json.load(f))
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# Builds text-only PDFs in memory so PDF benchmarks need no extra dependencies.
+import random
+
+
+def make_pdf(pages: int = 10, lines_per_page: int = 40, seed: int = 0, keyword_every: int = 0) -> bytes:
+    rng = random.Random(seed)
+    words = ["invoice", "shipment", "contract", "clause", "party", "delivery", "amount",
+             "service", "period", "term", "payment", "vendor", "customer", "schedule"]
+
+    objects = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    pages_id = add(b"")  # filled in once the page ids are known
+    page_ids = []
+    for number in range(pages):
+        lines = []
+        for i in range(lines_per_page):
+            text = " ".join(rng.choice(words) for _ in range(10))
+            if keyword_every and number % keyword_every == 0 and i == 0:
+                text = "GDPR obligations and the total amount due"
+            lines.append(f"({text}) Tj 0 -14 Td")
+        stream = ("BT /F1 10 Tf 40 800 Td " + " ".join(lines) + " ET").encode("latin-1")
+        content_id = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (pages_id, font_id, content_id)))
+    kids = b" ".join(b"%d 0 R" % pid for pid in page_ids)
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_ids)
+    catalog_id = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog_id, xref)
+    return bytes(out)
@@ -0,0 +1,84 @@
+# Peak Python heap (tracemalloc) while ingesting one PDF upload, running the
+# rule-based classifier fast path on it and building its prompt text: the old
+# latin-1 str round-trip versus bytes and spooled uploads.
+#
+#   python -m benchmarks.upload_memory_benchmark --pages 1000
+import argparse
+import io
+import json
+import os
+import tempfile
+import tracemalloc
+
+import PyPDF2
+
+from agents.pdf_agent import PDFAgent
+from agents.rule_classifier import RuleClassifier
+from benchmarks.synthetic_pdf import make_pdf
+from uploads import spool_upload
+
+
+def old_path(upload):
+    # await file.read() -> decode('latin-1') -> stored as TEXT -> encode('latin-1')
+    content = upload.read().decode('latin-1')
+    stored = content
+    with io.BytesIO(content.encode('latin-1')) as pdf_file:
+        reader = PyPDF2.PdfReader(pdf_file)
+        text = ""
+        for page in reader.pages:
+            text += page.extract_text() + "\n"
+    return stored, text[:5000]
+
+
+def bytes_path(upload):
+    content = upload.read()
+    return content, RuleClassifier().classify(content, "pdf"), PDFAgent(None, None).prompt_text(content)
+
+
+def spooled_path(upload):
+    content = spool_upload(upload, tempfile.mkdtemp(), "upload.pdf")
+    return content, RuleClassifier().classify(content, "pdf"), PDFAgent(None, None).prompt_text(content)
+
+
+def classifier_path(upload):
+    # The fast path alone, on an upload already in memory
+    content = upload.read()
+    return content, RuleClassifier().classify(content, "pdf")
+
+
+def measure(func, pdf_bytes, workdir):
+    # The upload arrives as a temp file, as it does from UploadFile
+    path = os.path.join(workdir, "incoming.pdf")
+    with open(path, "wb") as f:
+        f.write(pdf_bytes)
+    with open(path, "rb") as upload:
+        tracemalloc.start()
+        result = func(upload)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    del result
+    return round(peak / (1024 * 1024), 2)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=1000)
+    args = parser.parse_args()
+
+    pdf_bytes = make_pdf(args.pages)
+    workdir = tempfile.mkdtemp()
+    size_mb = round(len(pdf_bytes) / (1024 * 1024), 2)
+    print(json.dumps({
+        "pages": args.pages,
+        "file_mb": size_mb,
+        "peak_mb": {
+            "old_latin1_str": measure(old_path, pdf_bytes, workdir),
+            "bytes": measure(bytes_path, pdf_bytes, workdir),
+            "spooled_mmap": measure(spooled_path, pdf_bytes, workdir),
+            "classifier_fast_path": measure(classifier_path, pdf_bytes, workdir)
+        }
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import queue
+import sqlite3
+import threading
+from typing import Dict, Any
+
+
+class PooledConnection(sqlite3.Connection):
+    # close() hands the connection back to its pool instead of closing it, so
+    # existing `conn = get_db_conn() ... conn.close()` call sites keep working
+    pool = None
+
+    def close(self):
+        if self.pool is None:
+            super().close()
+        else:
+            self.pool.release(self)
+
+
+class ConnectionPool:
+    def __init__(self, db_path: str, size: int = 16, busy_timeout_ms: int = 5000,
+                 mmap_size: int = 256 * 1024 * 1024, cached_statements: int = 256,
+                 synchronous: str = "NORMAL", wait_timeout: float = 30.0):
+        self.db_path = db_path
+        self.size = size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.mmap_size = mmap_size
+        self.cached_statements = cached_statements
+        self.synchronous = synchronous
+        self.wait_timeout = wait_timeout
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self.checkouts = 0
+        self.waits = 0
+
+    def _connect(self) -> PooledConnection:
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout_ms / 1000,
+                               factory=PooledConnection, check_same_thread=False,
+                               cached_statements=self.cached_statements)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute(f"PRAGMA busy_timeout={self.busy_timeout_ms}")
+        conn.execute(f"PRAGMA mmap_size={self.mmap_size}")
+        conn.pool = self
+        return conn
+
+    def connection(self) -> PooledConnection:
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.size
+                if create:
+                    self._created += 1
+            if create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                with self._lock:
+                    self.waits += 1
+                conn = self._idle.get(timeout=self.wait_timeout)
+        with self._lock:
+            self.checkouts += 1
+        return conn
+
+    def release(self, conn: PooledConnection):
+        # Never hand out a connection with a half-finished transaction
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    def close_all(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.pool = None
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": self.size,
+                "open": self._created,
+                "idle": self._idle.qsize(),
+                "checkouts": self.checkouts,
+                "waits": self.waits
+            }
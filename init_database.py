@@ -1,8 +1,8 @@
 import sqlite3
 
 
-def init_db():
-    conn = sqlite3.connect('memory_store.db')
+def init_db(db_path='memory_store.db'):
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
     # Create main requests table
@@ -47,6 +47,85 @@ def init_db():
         )
     ''')
 
+    # Denormalized intent so history can be filtered without parsing JSON
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(requests)")]
+    if 'intent' not in columns:
+        cursor.execute("ALTER TABLE requests ADD COLUMN intent TEXT")
+        cursor.execute('''
+            UPDATE requests SET intent = json_extract(classification, '$.intent')
+            WHERE classification IS NOT NULL AND json_valid(classification)
+        ''')
+
+    # Pipeline progress for async jobs (queued/classifying/extracting/routing/done/failed)
+    if 'status' not in columns:
+        cursor.execute("ALTER TABLE requests ADD COLUMN status TEXT")
+        cursor.execute("ALTER TABLE requests ADD COLUMN job_options TEXT")
+        cursor.execute("ALTER TABLE requests ADD COLUMN error TEXT")
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_requests_status ON requests (status)
+    ''')
+
+    # Large binary uploads live on disk; raw_input holds bytes (BLOB) otherwise
+    if 'raw_input_ref' not in columns:
+        cursor.execute("ALTER TABLE requests ADD COLUMN raw_input_ref TEXT")
+
+    # Keyset pagination walks (timestamp, request_id) newest first
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_requests_timestamp ON requests (timestamp, request_id)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_requests_input_type ON requests (input_type, timestamp, request_id)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_requests_intent ON requests (intent, timestamp, request_id)
+    ''')
+
+    # Executor metadata: idempotency key per request + action, outcome and timings
+    execution_columns = [row[1] for row in cursor.execute("PRAGMA table_info(action_executions)")]
+    if 'idempotency_key' not in execution_columns:
+        cursor.execute("ALTER TABLE action_executions ADD COLUMN request_id TEXT")
+        cursor.execute("ALTER TABLE action_executions ADD COLUMN idempotency_key TEXT")
+        cursor.execute("ALTER TABLE action_executions ADD COLUMN status TEXT")
+        cursor.execute("ALTER TABLE action_executions ADD COLUMN attempts INTEGER")
+        cursor.execute("ALTER TABLE action_executions ADD COLUMN started_at REAL")
+        cursor.execute("ALTER TABLE action_executions ADD COLUMN duration_ms REAL")
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_action_executions_key ON action_executions (idempotency_key, status)
+    ''')
+
+    # Per-stage spans of each pipeline run (see metrics.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS request_timings (
+            request_id TEXT,
+            stage TEXT,
+            offset_ms REAL,
+            duration_ms REAL
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_request_timings_request ON request_timings (request_id)
+    ''')
+
+    # Sampled stacks of profiled requests, in collapsed (flamegraph) format
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS request_profiles (
+            request_id TEXT PRIMARY KEY,
+            started_at REAL,
+            duration_ms REAL,
+            interval_ms REAL,
+            samples INTEGER,
+            collapsed TEXT
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS llm_cache (
+            cache_key TEXT PRIMARY KEY,
+            response_text TEXT,
+            expires_at REAL
+        )
+    ''')
+
     conn.commit()
     conn.close()
 
@@ -0,0 +1,87 @@
+import itertools
+import logging
+import queue
+import threading
+from typing import Dict, Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    # Priority-ordered in-process worker pool for 202-Accepted submissions.
+    # Lower priority numbers run first; ties run in submission order.
+    def __init__(self, handler: Callable, workers: int = 4, priorities: Optional[Dict[str, int]] = None,
+                 default_priority: int = 100):
+        self.handler = handler
+        self.worker_count = workers
+        self.priorities = priorities or {}
+        self.default_priority = default_priority
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._threads = []
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.running = 0
+
+    def start(self):
+        for i in range(self.worker_count - len(self._threads)):
+            thread = threading.Thread(target=self._run_worker, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, request_id: str, input_type: str, *args):
+        priority = self.priorities.get(input_type, self.default_priority)
+        with self._lock:
+            self.submitted += 1
+        self._queue.put((priority, next(self._sequence), request_id, args))
+
+    def _run_worker(self):
+        while True:
+            priority, _, request_id, args = self._queue.get()
+            if request_id is None:
+                return
+            with self._lock:
+                self.running += 1
+            try:
+                self.handler(request_id, *args)
+                with self._lock:
+                    self.completed += 1
+            except Exception:
+                logger.exception("Job %s failed", request_id)
+                with self._lock:
+                    self.failed += 1
+            finally:
+                with self._lock:
+                    self.running -= 1
+
+    def stop(self, timeout: float = 5.0):
+        # Sentinels sort after every real job; unfinished jobs stay in the
+        # database with an in-progress status and are recovered on restart
+        for _ in self._threads:
+            self._queue.put((float('inf'), next(self._sequence), None, ()))
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.worker_count,
+                "queued": self._queue.qsize(),
+                "running": self.running,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed
+            }
+
+
+def parse_priorities(spec: str) -> Dict[str, int]:
+    # "email:0,json:1,pdf:2"
+    priorities = {}
+    for part in spec.split(","):
+        if ":" in part:
+            name, _, value = part.partition(":")
+            priorities[name.strip()] = int(value)
+    return priorities
@@ -0,0 +1,102 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+from metrics import span
+
+
+class LLMCache:
+    def __init__(self, db_conn_func, max_entries: int = 1024, ttl_seconds: float = 86400):
+        self.get_db_conn = db_conn_func
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(namespace: str, prompt_version: str, model_name: str, content: str) -> str:
+        digest = hashlib.sha256()
+        for part in (namespace, prompt_version, model_name, content):
+            digest.update(part.encode('utf-8', 'surrogatepass'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.memory_hits += 1
+                    return value
+                del self._entries[key]
+
+        # Fall back to the persistent tier
+        conn = self.get_db_conn()
+        try:
+            row = conn.execute(
+                "SELECT response_text, expires_at FROM llm_cache WHERE cache_key = ?", (key,)).fetchone()
+            if row and row[1] <= now:
+                conn.execute("DELETE FROM llm_cache WHERE cache_key = ?", (key,))
+                conn.commit()
+                row = None
+        finally:
+            conn.close()
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.db_hits += 1
+            self._remember(key, row[1], row[0])
+        return row[0]
+
+    def set(self, key: str, value: str):
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._remember(key, expires_at, value)
+
+        with span("db_write.llm_cache"):
+            conn = self.get_db_conn()
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (cache_key, response_text, expires_at) VALUES (?, ?, ?)",
+                    (key, value, expires_at))
+                conn.commit()
+            finally:
+                conn.close()
+
+    def record_bypass(self):
+        with self._lock:
+            self.bypasses += 1
+
+    def _remember(self, key: str, expires_at: float, value: str):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.memory_hits + self.db_hits
+            lookups = hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "memory_hits": self.memory_hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "bypasses": self.bypasses,
+                "evictions": self.evictions,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0
+            }
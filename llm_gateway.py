@@ -0,0 +1,220 @@
+import logging
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class LLMUnavailableError(Exception):
+    # The gateway refused or gave up on a call; callers fall back to local logic
+    pass
+
+
+class CircuitOpenError(LLMUnavailableError):
+    pass
+
+
+class QueueTimeoutError(LLMUnavailableError):
+    pass
+
+
+class RateLimitedError(LLMUnavailableError):
+    pass
+
+
+def is_overload(error: Exception) -> bool:
+    # google.api_core ResourceExhausted/TooManyRequests carry code 429; 503 is
+    # the provider shedding load
+    code = getattr(error, 'code', None)
+    if callable(code):
+        code = None
+    return code in (429, 503) or type(error).__name__ in ("ResourceExhausted", "TooManyRequests",
+                                                         "ServiceUnavailable")
+
+
+class TokenBucket:
+    # Refills continuously at per_minute / 60 per second up to one minute's worth
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        # Takes the tokens now (possibly going negative) and returns how long
+        # the caller must wait before they are actually available
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= min(amount, self.capacity)
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def refund(self, amount: float):
+        with self.lock:
+            self.tokens = min(self.capacity, self.tokens + min(amount, self.capacity))
+
+
+class LLMGateway:
+    # Shared front for every agent's model calls; exposes generate_content and
+    # model_name so it drops in where the model was used.
+    #   - AIMD concurrency: +1/limit per success, halved on a 429/503
+    #   - token buckets for requests and (estimated) tokens per minute
+    #   - callers queue for a slot until queue_timeout, then get QueueTimeoutError
+    #   - circuit breaker: breaker_threshold consecutive failures open it for
+    #     breaker_cooldown seconds, after which one probe call is let through
+    #     (429s only count once the limit is already at min_concurrency)
+    def __init__(self, model, max_concurrency: int = 16, min_concurrency: int = 1,
+                 initial_concurrency: Optional[int] = None, requests_per_minute: float = 0,
+                 tokens_per_minute: float = 0, output_tokens: int = 512, queue_timeout: float = 10.0,
+                 breaker_threshold: int = 5, breaker_cooldown: float = 30.0, decrease_interval: float = 1.0):
+        self.model = model
+        self.model_name = getattr(model, 'model_name', 'unknown')
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = float(initial_concurrency or max_concurrency)
+        self.decrease_interval = decrease_interval
+        self.last_decrease = 0.0
+        self.inflight = 0
+        self.waiting = 0
+        self.condition = threading.Condition()
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.output_tokens = output_tokens
+        self.queue_timeout = queue_timeout
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.breaker_state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_inflight = False
+        self.counters = {"calls": 0, "succeeded": 0, "failed": 0, "overloaded": 0, "queue_timeouts": 0,
+                         "rate_limited": 0, "circuit_rejections": 0, "circuit_opens": 0}
+
+    def generate_content(self, prompt, **kwargs):
+        deadline = time.monotonic() + self.queue_timeout
+        probe = self.check_breaker()
+        reserved = []
+        try:
+            reserved = self.wait_for_budget(prompt, deadline)
+            self.acquire(deadline)
+        except LLMUnavailableError:
+            # The call never happens, so it should not count against the limits
+            self.refund_budget(reserved)
+            if probe:
+                self.release_probe()
+            raise
+
+        try:
+            response = self.model.generate_content(prompt, **kwargs)
+        except Exception as e:
+            overload = is_overload(e)
+            self.release(success=False, overload=overload, probe=probe)
+            if overload:
+                # Quota errors become the fallback signal agents already handle
+                raise RateLimitedError(str(e) or type(e).__name__) from e
+            raise
+        self.release(success=True, overload=False, probe=probe)
+        return response
+
+    def check_breaker(self) -> bool:
+        # Returns True when this call is the half-open probe
+        with self.condition:
+            self.counters["calls"] += 1
+            if self.breaker_state == "closed":
+                return False
+            if self.breaker_state == "open" and time.monotonic() - self.opened_at >= self.breaker_cooldown:
+                self.breaker_state = "half_open"
+            if self.breaker_state == "half_open" and not self.probe_inflight:
+                self.probe_inflight = True
+                return True
+            self.counters["circuit_rejections"] += 1
+            raise CircuitOpenError("LLM circuit breaker is open")
+
+    def release_probe(self):
+        with self.condition:
+            self.probe_inflight = False
+
+    def wait_for_budget(self, prompt, deadline: float) -> List[Tuple[TokenBucket, float]]:
+        # Returns what was reserved, for refund_budget if the call is abandoned
+        waits = []
+        if self.request_bucket is not None:
+            waits.append((self.request_bucket, 1, self.request_bucket.reserve(1)))
+        if self.token_bucket is not None:
+            # Rough estimate: ~4 characters per token plus the expected reply
+            tokens = len(str(prompt)) / 4 + self.output_tokens
+            waits.append((self.token_bucket, tokens, self.token_bucket.reserve(tokens)))
+        reserved = [(bucket, amount) for bucket, amount, _ in waits]
+        wait = max((w for _, _, w in waits), default=0.0)
+        if wait <= 0:
+            return reserved
+        if time.monotonic() + wait > deadline:
+            self.refund_budget(reserved)
+            with self.condition:
+                self.counters["rate_limited"] += 1
+            raise RateLimitedError(f"Rate limit would delay the call by {wait:.1f}s")
+        time.sleep(wait)
+        return reserved
+
+    @staticmethod
+    def refund_budget(reserved: List[Tuple[TokenBucket, float]]):
+        for bucket, amount in reserved:
+            bucket.refund(amount)
+
+    def acquire(self, deadline: float):
+        with self.condition:
+            self.waiting += 1
+            try:
+                while self.inflight >= int(self.limit):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.counters["queue_timeouts"] += 1
+                        raise QueueTimeoutError("Timed out waiting for an LLM slot")
+                    self.condition.wait(remaining)
+            finally:
+                self.waiting -= 1
+            self.inflight += 1
+
+    def release(self, success: bool, overload: bool, probe: bool):
+        with self.condition:
+            self.inflight -= 1
+            if probe:
+                self.probe_inflight = False
+            if success:
+                self.counters["succeeded"] += 1
+                self.consecutive_failures = 0
+                if self.breaker_state != "closed":
+                    logger.info("LLM circuit breaker closed")
+                self.breaker_state = "closed"
+                # Additive increase: about +1 once a full window of calls succeeds
+                self.limit = min(self.max_concurrency, self.limit + 1.0 / self.limit)
+            else:
+                self.counters["failed"] += 1
+                now = time.monotonic()
+                if overload:
+                    self.counters["overloaded"] += 1
+                    # Multiplicative decrease, once per interval so one burst of
+                    # 429s does not collapse the limit straight to the minimum
+                    if now - self.last_decrease >= self.decrease_interval:
+                        self.limit = max(self.min_concurrency, self.limit / 2)
+                        self.last_decrease = now
+                # 429s are AIMD's job until the limit cannot go any lower; every
+                # other failure counts towards the breaker straight away
+                if not overload or self.limit <= self.min_concurrency:
+                    self.consecutive_failures += 1
+                if probe or (self.breaker_state == "closed" and self.consecutive_failures >= self.breaker_threshold):
+                    if self.breaker_state != "open":
+                        self.counters["circuit_opens"] += 1
+                        logger.warning("LLM circuit breaker opened after %d consecutive failures",
+                                       self.consecutive_failures)
+                    self.breaker_state = "open"
+                    self.opened_at = now
+            self.condition.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self.condition:
+            return dict(self.counters, concurrency_limit=round(self.limit, 2), inflight=self.inflight,
+                        waiting=self.waiting, breaker_state=self.breaker_state,
+                        consecutive_failures=self.consecutive_failures)
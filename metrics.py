@@ -0,0 +1,216 @@
+import bisect
+import contextvars
+import functools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Tuple
+
+# Stage timings of the request running in this context. run_blocking and the
+# attachment/speculative pools copy the context, so spans from their threads
+# land on the same request. Outside a request this is None and spans cost one
+# lookup.
+current_timings = contextvars.ContextVar("current_timings", default=None)
+
+# Seconds; the Prometheus client defaults plus a 30s bucket for large PDFs
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Intents outside this set (free-form LLM output) are reported as "other" so a
+# bad reply cannot blow up label cardinality
+KNOWN_INTENTS = {"rfq", "complaint", "invoice", "regulation", "fraud_risk", "unknown"}
+
+
+class RequestTimings:
+    def __init__(self):
+        self.start = time.perf_counter()
+        # (stage, offset_ms from request start, duration_ms)
+        self.spans = []
+
+    def add(self, stage: str, start: float, end: float):
+        # list.append is atomic, so helper threads can record concurrently
+        self.spans.append((stage, round((start - self.start) * 1000, 3), round((end - start) * 1000, 3)))
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+
+@contextmanager
+def span(stage: str):
+    timings = current_timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(stage, start, time.perf_counter())
+
+
+def timed(stage: str):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            timings = current_timings.get()
+            if timings is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timings.add(stage, start, time.perf_counter())
+        return wrapper
+    return decorator
+
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names: Tuple[str, ...], values: Tuple[Any, ...], extra: str = "") -> str:
+    parts = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...], buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        # labels -> [per-bucket counts (non-cumulative, last is +Inf), sum, count]
+        self.series = {}
+
+    def observe(self, labels: Tuple[Any, ...], value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            entry = self.series.get(labels)
+            if entry is None:
+                entry = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            series = [(labels, list(counts), total, count) for labels, (counts, total, count) in self.series.items()]
+        for labels, counts, total, count in sorted(series):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = format_labels(self.label_names, labels, f'le="{format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            plain = format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{plain} {format_value(total)}")
+            lines.append(f"{self.name}_count{plain} {count}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def add(self, labels: Tuple[Any, ...], amount: float):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with self.lock:
+            values = sorted(self.values.items())
+        return render_samples(self.name, "gauge", self.help_text,
+                              [(dict(zip(self.label_names, labels)), value) for labels, value in values])
+
+
+class Counter(Gauge):
+    def render(self) -> List[str]:
+        with self.lock:
+            values = sorted(self.values.items())
+        return render_samples(self.name, "counter", self.help_text,
+                              [(dict(zip(self.label_names, labels)), value) for labels, value in values])
+
+
+def render_samples(name: str, kind: str, help_text: str, samples: List[Tuple[Dict[str, Any], float]]) -> List[str]:
+    # For values read from the components' stats() at scrape time
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        lines.append(f"{name}{format_labels(tuple(labels), tuple(labels.values()))} {format_value(value)}")
+    return lines
+
+
+stage_seconds = Histogram("pipeline_stage_duration_seconds", "Time spent in each pipeline stage",
+                          ("stage", "input_type", "intent"))
+request_seconds = Histogram("pipeline_request_duration_seconds", "End-to-end pipeline time per request",
+                            ("input_type", "intent"))
+requests_inflight = Gauge("pipeline_requests_in_flight", "Requests currently in the pipeline", ("input_type",))
+requests_total = Counter("pipeline_requests_total", "Pipeline runs by outcome", ("input_type", "status"))
+
+
+def intent_label(classification) -> str:
+    intent = classification.get('intent') if isinstance(classification, dict) else None
+    return intent if intent in KNOWN_INTENTS else ("unknown" if intent is None else "other")
+
+
+@contextmanager
+def track_request(record):
+    # Collects the spans of one pipeline run into record.timings (persisted with
+    # the record) and feeds the histograms once the run, including its own
+    # database write, is over
+    timings = start_request(record)
+    try:
+        with bind_timings(timings):
+            yield timings
+    finally:
+        finish_request(record, timings)
+
+
+def start_request(record) -> RequestTimings:
+    # For runs split across threads (batch items); pair with finish_request
+    timings = RequestTimings()
+    record.timings = timings.spans
+    requests_inflight.add((record.input_type,), 1)
+    return timings
+
+
+def finish_request(record, timings: RequestTimings):
+    requests_inflight.add((record.input_type,), -1)
+    observe_request(record, timings)
+
+
+@contextmanager
+def bind_timings(timings: RequestTimings):
+    token = current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        current_timings.reset(token)
+
+
+def observe_request(record, timings: RequestTimings):
+    intent = intent_label(record.classification)
+    for stage, _, duration_ms in list(timings.spans):
+        stage_seconds.observe((stage, record.input_type, intent), duration_ms / 1000)
+    request_seconds.observe((record.input_type, intent), timings.elapsed())
+    requests_total.add((record.input_type, "failed" if record.status == "failed" else "done"), 1)
+
+
+def render(extra: Optional[List[str]] = None) -> str:
+    lines = []
+    for metric in (request_seconds, stage_seconds, requests_inflight, requests_total):
+        lines.extend(metric.render())
+    lines.extend(extra or [])
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,205 @@
+import json
+import logging
+import queue
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from metrics import timed
+
+logger = logging.getLogger(__name__)
+
+
+class RequestRecord:
+    # Everything one /process call writes, collected in memory and flushed in a
+    # single transaction instead of an INSERT plus an UPDATE per stage
+    fields = ['classification', 'agent_results', 'actions', 'action_results']
+
+    def __init__(self, request_id: str, raw_input, input_type: str, timestamp: Optional[str] = None):
+        self.request_id = request_id
+        # Spooled uploads are stored by file reference rather than inline
+        self.raw_input_ref = getattr(raw_input, 'path', None)
+        self.raw_input = None if self.raw_input_ref else raw_input
+        self.input_type = input_type
+        self.timestamp = timestamp or datetime.now().isoformat()
+        self.classification = None
+        self.agent_results = None
+        self.actions = None
+        self.action_results = None
+        self.error = None
+        self.status = None
+        # Optional callback(record, stage) used by async jobs to publish progress
+        self.on_stage = None
+        self.classifications = []
+        self.action_logs = []
+        self.action_executions = []
+        # (stage, offset_ms, duration_ms) spans, see metrics.track_request
+        self.timings = []
+
+    def set_stage(self, stage: str):
+        self.status = stage
+        if self.on_stage is not None:
+            self.on_stage(self, stage)
+
+    def add_classification(self, content_sample, classification: Dict[str, Any]):
+        self.classifications.append((content_sample, json.dumps(classification)))
+
+    def add_action_log(self, intent: str, actions: List[str]):
+        self.action_logs.append((intent, json.dumps(actions)))
+
+    def add_action_execution(self, action_name: str, result: Dict[str, Any]):
+        self.action_executions.append(execution_row(self.request_id, action_name, result))
+
+    def to_row(self):
+        intent = self.classification.get('intent') if isinstance(self.classification, dict) else None
+        row = [self.request_id, self.raw_input, self.raw_input_ref, self.input_type, self.timestamp, intent]
+        for field in self.fields:
+            value = getattr(self, field)
+            row.append(json.dumps(value) if value is not None else None)
+        row.extend([self.status, self.error])
+        return row
+
+    def to_response(self) -> Dict[str, Any]:
+        response = {"request_id": self.request_id}
+        for field in self.fields:
+            if getattr(self, field) is not None:
+                response[field] = getattr(self, field)
+        if self.error is not None:
+            response["error"] = self.error
+        return response
+
+
+EXECUTION_INSERT = '''
+    INSERT INTO action_executions (request_id, action_name, result, idempotency_key, status, attempts,
+                                   started_at, duration_ms)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def execution_row(request_id: Optional[str], action_name: str, result: Dict[str, Any]):
+    return (request_id, action_name, json.dumps(result), result.get('idempotency_key'), result.get('status'),
+            result.get('attempts'), result.get('started_at'), result.get('duration_ms'))
+
+
+def write_records(conn, records: List[RequestRecord]):
+    with conn:
+        conn.executemany('''
+            INSERT INTO requests (request_id, raw_input, raw_input_ref, input_type, timestamp, intent,
+                                  classification, agent_results, actions, action_results, status, error)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(request_id) DO UPDATE SET
+                intent = excluded.intent,
+                classification = excluded.classification,
+                agent_results = excluded.agent_results,
+                actions = excluded.actions,
+                action_results = excluded.action_results,
+                status = excluded.status,
+                error = excluded.error
+        ''', [record.to_row() for record in records])
+        conn.executemany(
+            "INSERT INTO classifications (content_sample, classification_result) VALUES (?, ?)",
+            [row for record in records for row in record.classifications])
+        conn.executemany(
+            "INSERT INTO action_logs (intent, determined_actions) VALUES (?, ?)",
+            [row for record in records for row in record.action_logs])
+        conn.executemany(EXECUTION_INSERT, [row for record in records for row in record.action_executions])
+        conn.executemany(
+            "INSERT INTO request_timings (request_id, stage, offset_ms, duration_ms) VALUES (?, ?, ?, ?)",
+            [(record.request_id,) + tuple(timing) for record in records for timing in list(record.timings)])
+
+
+class RequestStore:
+    # durability:
+    #   sync         - commit this request's transaction before returning
+    #   group        - hand off to the writer thread and wait for the group commit
+    #                  that includes it (durable on return, fewer fsyncs under load)
+    #   write_behind - hand off and return immediately; up to flush_interval of
+    #                  finished requests can be lost if the process dies
+    durability_modes = ("sync", "group", "write_behind")
+
+    def __init__(self, db_conn_func, durability: str = "sync", flush_interval: float = 0.05,
+                 max_batch: int = 256):
+        if durability not in self.durability_modes:
+            raise ValueError(f"Unknown durability mode: {durability}")
+        self.get_db_conn = db_conn_func
+        self.durability = durability
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.transactions = 0
+        self.records_written = 0
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._writer = None
+        if durability != "sync":
+            self._writer = threading.Thread(target=self._run_writer, name="request-writer", daemon=True)
+            self._writer.start()
+
+    def save(self, record: RequestRecord):
+        if self.durability == "sync":
+            self.flush([record])
+            return
+
+        done = threading.Event() if self.durability == "group" else None
+        self._queue.put((record, done))
+        if done is not None:
+            done.wait()
+            if getattr(done, 'error', None) is not None:
+                raise done.error
+
+    @timed("db_write.requests")
+    def flush(self, records: List[RequestRecord]):
+        if not records:
+            return
+        conn = self.get_db_conn()
+        try:
+            write_records(conn, records)
+        finally:
+            conn.close()
+        with self._lock:
+            self.transactions += 1
+            self.records_written += len(records)
+
+    def _run_writer(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            pending = [item]
+            stop = False
+            # Collect whatever else arrives within the flush window
+            try:
+                while len(pending) < self.max_batch:
+                    item = self._queue.get(timeout=self.flush_interval)
+                    if item is None:
+                        stop = True
+                        break
+                    pending.append(item)
+            except queue.Empty:
+                pass
+
+            error = None
+            try:
+                self.flush([record for record, _ in pending])
+            except Exception as e:
+                logger.exception("Failed to flush %d request records", len(pending))
+                error = e
+            for _, done in pending:
+                if done is not None:
+                    done.error = error
+                    done.set()
+            if stop:
+                return
+
+    def close(self):
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "durability": self.durability,
+                "transactions": self.transactions,
+                "records_written": self.records_written,
+                "queued": self._queue.qsize()
+            }
@@ -0,0 +1,143 @@
+import contextvars
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+# Profile of the request running in this context; None (the normal case) means
+# nothing is sampled and the hooks below cost a single lookup
+current_profile = contextvars.ContextVar("current_profile", default=None)
+
+
+class RequestProfile:
+    def __init__(self, request_id: str, interval: float = 0.005, max_depth: int = 128):
+        self.request_id = request_id
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks = Counter()
+        self.samples = 0
+        self.started_at = time.time()
+        self.duration_ms = None
+
+    def collapsed(self) -> str:
+        # Brendan Gregg's folded format, as read by flamegraph.pl and speedscope
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+
+def frame_name(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get('__name__') or os.path.basename(code.co_filename)
+    return f"{module}.{getattr(code, 'co_qualname', code.co_name)}".replace(";", ":")
+
+
+def thread_label(name: str) -> str:
+    # "attachment-worker_3" -> "attachment-worker", so pool threads merge
+    prefix, _, suffix = name.rpartition("_")
+    return prefix if prefix and suffix.isdigit() else name
+
+
+class StackSampler:
+    # One background thread that wakes every interval and records the Python
+    # stack of each thread currently registered to a profiled request. It only
+    # runs while at least one profiled request is in progress.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.targets = {}
+        self.thread = None
+
+    def add(self, ident: int, name: str, profile: RequestProfile):
+        with self.lock:
+            self.targets[ident] = (thread_label(name), profile)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="stack-sampler", daemon=True)
+                self.thread.start()
+
+    def remove(self, ident: int):
+        with self.lock:
+            self.targets.pop(ident, None)
+
+    def run(self):
+        while True:
+            # Sampling happens under the lock, so once remove() returns no more
+            # samples are added to that request's profile
+            with self.lock:
+                if not self.targets:
+                    self.thread = None
+                    return
+                frames = sys._current_frames()
+                for ident, (label, profile) in self.targets.items():
+                    frame = frames.get(ident)
+                    if frame is None:
+                        continue
+                    stack = []
+                    while frame is not None and len(stack) < profile.max_depth:
+                        stack.append(frame_name(frame))
+                        frame = frame.f_back
+                    stack.append(label)
+                    profile.stacks[";".join(reversed(stack))] += 1
+                    profile.samples += 1
+                interval = min(profile.interval for _, profile in self.targets.values())
+                del frames
+            time.sleep(interval)
+
+
+sampler = StackSampler()
+
+
+@contextmanager
+def profile_request(profile: RequestProfile):
+    token = current_profile.set(profile)
+    ident = threading.get_ident()
+    sampler.add(ident, threading.current_thread().name, profile)
+    start = time.perf_counter()
+    try:
+        yield profile
+    finally:
+        sampler.remove(ident)
+        current_profile.reset(token)
+        profile.duration_ms = round((time.perf_counter() - start) * 1000, 3)
+
+
+def run_profiled(func, *args):
+    # For work a request hands to another pool thread (speculative extraction,
+    # email attachments); call it through ctx.run so the profile is visible
+    profile = current_profile.get()
+    if profile is None:
+        return func(*args)
+    ident = threading.get_ident()
+    sampler.add(ident, threading.current_thread().name, profile)
+    try:
+        return func(*args)
+    finally:
+        sampler.remove(ident)
+
+
+def save_profile(db_conn_func, profile: RequestProfile):
+    conn = db_conn_func()
+    try:
+        with conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO request_profiles (request_id, started_at, duration_ms, interval_ms,
+                                                         samples, collapsed)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (profile.request_id, profile.started_at, profile.duration_ms, profile.interval * 1000,
+                  profile.samples, profile.collapsed()))
+    finally:
+        conn.close()
+
+
+def load_profile(db_conn_func, request_id: str) -> Optional[Dict[str, Any]]:
+    conn = db_conn_func()
+    try:
+        row = conn.execute('''
+            SELECT started_at, duration_ms, interval_ms, samples, collapsed FROM request_profiles
+            WHERE request_id = ?
+        ''', (request_id,)).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    return dict(zip(("started_at", "duration_ms", "interval_ms", "samples", "collapsed"), row))
@@ -0,0 +1,192 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Any, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+# Comparison operators a condition may use, keyed by their name in the rules file
+OPERATORS = {
+    "eq": lambda value, arg: value == arg,
+    "ne": lambda value, arg: value != arg,
+    "in": lambda value, arg: value in arg,
+    "not_in": lambda value, arg: value not in arg,
+    "gt": lambda value, arg: value > arg,
+    "gte": lambda value, arg: value >= arg,
+    "lt": lambda value, arg: value < arg,
+    "lte": lambda value, arg: value <= arg,
+    "truthy": lambda value, arg: bool(value) == arg
+}
+
+
+def compile_getter(path: str, default=None) -> Callable[[Dict[str, Any]], Any]:
+    # "fields.total" behaves like results.get("fields", {}).get("total", default)
+    parts = path.split(".")
+    if len(parts) == 1:
+        key = parts[0]
+        return lambda results: results.get(key, default) if isinstance(results, dict) else default
+
+    def getter(results):
+        value = results
+        for part in parts:
+            value = value.get(part, MISSING) if isinstance(value, dict) else MISSING
+            if value is MISSING:
+                return default
+        return value
+    return getter
+
+
+def compile_condition(spec: Dict[str, Any]) -> Callable[[Dict[str, Any]], bool]:
+    if "all" in spec:
+        parts = [compile_condition(s) for s in spec["all"]]
+        return lambda results: all(p(results) for p in parts)
+    if "any" in spec:
+        parts = [compile_condition(s) for s in spec["any"]]
+        if len(parts) == 2:
+            first, second = parts
+            return lambda results: first(results) or second(results)
+        return lambda results: any(p(results) for p in parts)
+    if "not" in spec:
+        inner = compile_condition(spec["not"])
+        return lambda results: not inner(results)
+
+    getter = compile_getter(spec["field"], spec.get("default"))
+    if "exists" in spec:
+        raw = compile_getter(spec["field"], MISSING)
+        expected = bool(spec["exists"])
+        return lambda results: (raw(results) is not MISSING) == expected
+
+    checks = [(OPERATORS[name], arg) for name, arg in spec.items() if name in OPERATORS]
+    unknown = set(spec) - set(OPERATORS) - {"field", "default"}
+    if unknown or not checks:
+        raise ValueError(f"Invalid condition {spec!r}")
+
+    if len(checks) == 1:
+        # The common case, without the all() generator
+        op, arg = checks[0]
+
+        def predicate(results):
+            try:
+                return op(getter(results), arg)
+            except TypeError:
+                # e.g. a string total compared with a number never matches
+                return False
+        return predicate
+
+    def predicate(results):
+        value = getter(results)
+        try:
+            return all(op(value, arg) for op, arg in checks)
+        except TypeError:
+            return False
+    return predicate
+
+
+def compile_actions(rule: Dict[str, Any]) -> Callable[[Dict[str, Any]], List[str]]:
+    if "for_each" in rule:
+        # One action per element, looked up in "map"; an empty list does not match
+        items = compile_getter(rule["for_each"])
+        mapping = rule.get("map", {})
+        default_action = rule.get("default_action")
+
+        def actions(results):
+            values = items(results)
+            if not values:
+                return []
+            if not isinstance(values, (list, tuple)):
+                values = [values]
+            mapped = [mapping.get(v, default_action) if isinstance(v, str) else default_action for v in values]
+            return [a for a in mapped if a]
+        return actions
+
+    fixed = list(rule["actions"])
+    return lambda results: list(fixed)
+
+
+def compile_rules(spec: Dict[str, Any]) -> Dict[str, List[Tuple[Callable, Callable]]]:
+    # intent -> ordered (predicate, actions) pairs; the first rule that matches
+    # and yields at least one action decides
+    table = {}
+    for rule in spec["rules"]:
+        predicate = compile_condition(rule["when"]) if "when" in rule else (lambda results: True)
+        table.setdefault(rule["intent"], []).append((predicate, compile_actions(rule)))
+    return table
+
+
+class RuleEngine:
+    # Routing rules from a JSON file compiled into a dispatch table of closures.
+    # The file is re-checked at most every reload_interval seconds and a changed
+    # file is compiled and swapped in; a broken edit keeps the previous table.
+    def __init__(self, rules_path: str, reload_interval: float = 1.0):
+        self.rules_path = rules_path
+        self.reload_interval = reload_interval
+        self.lock = threading.Lock()
+        self.table = {}
+        self.mtime = None
+        self.checked_at = 0.0
+        self.version = 0
+        self.reload_errors = 0
+        self.reload()
+
+    def reload(self) -> bool:
+        with self.lock:
+            mtime = os.stat(self.rules_path).st_mtime_ns
+            try:
+                with open(self.rules_path) as f:
+                    table = compile_rules(json.load(f))
+            except (ValueError, KeyError, TypeError) as e:
+                self.reload_errors += 1
+                if not self.table:
+                    raise
+                logger.error("Keeping previous action rules; %s is invalid: %s", self.rules_path, e)
+                self.mtime = mtime
+                return False
+            self.table = table
+            self.mtime = mtime
+            self.version += 1
+            logger.info("Loaded action rules v%d from %s (%d intents)", self.version, self.rules_path, len(table))
+            return True
+
+    def maybe_reload(self):
+        now = time.monotonic()
+        if now - self.checked_at < self.reload_interval:
+            return
+        self.checked_at = now
+        try:
+            changed = os.stat(self.rules_path).st_mtime_ns != self.mtime
+        except OSError:
+            return
+        if changed:
+            self.reload()
+
+    @staticmethod
+    def dispatch(rules: List[Tuple[Callable, Callable]], agent_results: Dict[str, Any]) -> List[str]:
+        for predicate, actions in rules:
+            if predicate(agent_results):
+                result = actions(agent_results)
+                if result:
+                    return result
+        return []
+
+    def evaluate(self, agent_results: Dict[str, Any], intent: str) -> List[str]:
+        self.maybe_reload()
+        return self.dispatch(self.table.get(intent, ()), agent_results)
+
+    def evaluate_batch(self, items: List[Tuple[Dict[str, Any], str]]) -> List[List[str]]:
+        # One table snapshot for the whole batch, so a reload mid-way cannot mix rule versions
+        self.maybe_reload()
+        table = self.table
+        dispatch = self.dispatch
+        return [dispatch(table.get(intent, ()), agent_results) for agent_results, intent in items]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rules_path": self.rules_path,
+            "version": self.version,
+            "intents": sorted(self.table),
+            "reload_errors": self.reload_errors
+        }
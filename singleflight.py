@@ -0,0 +1,49 @@
+import asyncio
+import hashlib
+from typing import Awaitable, Callable, Dict, Any, Tuple
+
+
+def content_key(content, *parts) -> str:
+    # Hash of the payload plus whatever else must match for two calls to be
+    # interchangeable (input type, pipeline mode, cache use)
+    digest = hashlib.sha256(content.encode('utf-8') if isinstance(content, str) else bytes(content))
+    for part in parts:
+        digest.update(b"\0" + str(part).encode())
+    return digest.hexdigest()
+
+
+class SingleFlight:
+    # Coalesces concurrent calls with the same key on the event loop: the first
+    # caller runs the work, later ones await its future and get the same result
+    # (or exception). Nothing is cached once the call finishes.
+    def __init__(self):
+        self.calls: Dict[str, asyncio.Future] = {}
+        self.counters = {"leaders": 0, "coalesced": 0, "errors": 0}
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        # Returns (result, shared); shared is True for the waiting duplicates
+        future = self.calls.get(key)
+        if future is not None:
+            self.counters["coalesced"] += 1
+            return await asyncio.shield(future), True
+
+        future = asyncio.get_running_loop().create_future()
+        self.calls[key] = future
+        self.counters["leaders"] += 1
+        try:
+            result = await func()
+        except BaseException as e:
+            self.counters["errors"] += 1
+            future.set_exception(e)
+            # Retrieved here so a leader without followers does not log
+            # "exception was never retrieved"
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            del self.calls[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self.counters, inflight=len(self.calls))
@@ -0,0 +1,31 @@
+import json
+
+import pytest
+
+from action_router import DEFAULT_RULES_PATH
+from benchmarks.legacy_router import golden_cases, legacy_determine_actions
+from rule_engine import RuleEngine
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return RuleEngine(DEFAULT_RULES_PATH)
+
+
+def test_shipped_rules_match_legacy_router(engine):
+    # An edit to action_rules.json that changes routing for any combination of
+    # the fields the old router read fails here
+    mismatches = []
+    for agent_results, classification in golden_cases():
+        expected = legacy_determine_actions(agent_results, classification)
+        actual = engine.evaluate(agent_results, classification.get('intent', 'unknown'))
+        if actual != expected:
+            mismatches.append({"input": agent_results, "classification": classification,
+                               "legacy": expected, "rules": actual})
+    assert not mismatches, json.dumps(mismatches[:5], default=str)
+
+
+def test_batch_matches_single_evaluation(engine):
+    items = [(agent_results, classification.get('intent', 'unknown'))
+             for agent_results, classification in golden_cases()]
+    assert engine.evaluate_batch(items) == [engine.evaluate(*item) for item in items]
@@ -0,0 +1,33 @@
+import pytest
+
+from agents.json_extract import JSONExtractionError, extract_json
+
+
+def test_unquoted_keys_are_repaired():
+    value, outcome = extract_json('{format: "email", intent: "complaint", confidence: 0.9}')
+    assert value == {"format": "email", "intent": "complaint", "confidence": 0.9}
+    assert outcome == "repaired"
+
+
+def test_unquoted_nested_keys_in_prose():
+    reply = 'Sure! {classification: {format: "json", intent: None}, extraction: {valid: True,}} Hope it helps.'
+    value, _ = extract_json(reply)
+    assert value == {"classification": {"format": "json", "intent": None}, "extraction": {"valid": True}}
+
+
+def test_bare_values_are_not_quoted():
+    # Only identifiers followed by ':' are keys; an unknown bare value stays invalid
+    with pytest.raises(JSONExtractionError):
+        extract_json('{"intent": complaint}')
+
+
+def test_fenced_reply_is_extracted():
+    value, outcome = extract_json('```json\n{"format": "pdf"}\n```')
+    assert value == {"format": "pdf"}
+    assert outcome == "extracted"
+
+
+def test_escaped_quote_in_single_quoted_string():
+    value, outcome = extract_json(r"{'a': 'it\'s', 'b': 'say \"hi\"\n'}")
+    assert value == {"a": "it's", "b": 'say "hi"\n'}
+    assert outcome == "repaired"
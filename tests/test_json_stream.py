@@ -0,0 +1,45 @@
+import io
+import json
+
+import pytest
+
+from agents.json_stream import JSONStreamReader
+
+
+def decode_stream(text, chunk_size):
+    reader = JSONStreamReader(io.StringIO(text), chunk_size=chunk_size, max_depth=1)
+    return [value for event, path, value in reader.iter_nodes() if event == "value"]
+
+
+@pytest.mark.parametrize("text", [
+    "[12.50, 3.75]",
+    "[1234.56, 0.5, -7.25, 100.0]",
+    "[1e5, 2.5e-3, 6E+2, -3.25E10, 0.1e1]",
+])
+def test_numbers_split_at_every_chunk_size(text):
+    for chunk_size in range(1, len(text) + 1):
+        assert decode_stream(text, chunk_size) == json.loads(text), chunk_size
+
+
+def test_float_array_split_at_default_chunk_size():
+    readings = [1234.56 + i / 100 for i in range(20000)]
+    for pad in range(0, 40):
+        text = json.dumps({"pad": "x" * pad, "readings": readings})
+        reader = JSONStreamReader(io.StringIO(text))
+        values = [value for event, path, value in reader.iter_nodes() if path == "$.readings[]"]
+        assert values == readings, pad
+
+
+def test_array_at_depth_three_is_streamed():
+    records = [{"id": i, "note": "x" * 50} for i in range(2000)]
+    text = json.dumps({"meta": {"source": "export"}, "data": {"page": 1, "records": records}})
+    reader = JSONStreamReader(io.StringIO(text), chunk_size=1024)
+    events = list(reader.iter_nodes())
+
+    assert ("array", "$.data.records", None) in events
+    assert ("end", "$.data.records", len(records)) in events
+    assert [value for event, path, value in events if path == "$.data.records[]"] == records
+    # The array itself is never decoded as one value
+    assert not any(event == "value" and path == "$.data.records" for event, path, _ in events)
+    # Only about one chunk plus the record being decoded is buffered
+    assert len(reader.buffer) < 4 * 1024
@@ -0,0 +1,34 @@
+from agents.classifier_agent import ClassifierAgent
+from agents.rule_classifier import RuleClassifier
+
+
+class Record:
+    def __init__(self):
+        self.classifications = []
+
+    def add_classification(self, sample, classification):
+        self.classifications.append(classification)
+
+
+def fast_classify(content, input_type):
+    # Default threshold, as app.py uses when FAST_PATH_THRESHOLD is unset
+    agent = ClassifierAgent(None, None, fast_path=RuleClassifier())
+    return agent.fast_classify(content, input_type, Record())
+
+
+def test_refund_and_disappointed_email_skips_the_llm():
+    result = fast_classify("Hello, I am disappointed with my order and want a refund.", "email")
+    assert result is not None
+    assert result["intent"] == "complaint"
+    assert result["source"] == "rules"
+
+
+def test_single_strong_keyword_falls_back_to_the_llm():
+    assert fast_classify("I am unhappy with your service. My order was delayed.", "email") is None
+
+
+def test_json_examples_take_the_fast_path():
+    invoice = fast_classify('{"invoice_id": "INV-2023-456", "total": 12500.00, "due_date": "2023-12-31"}', "json")
+    fraud = fast_classify('{"transaction_id": "TX-987", "amount": 15000, "flagged": true}', "json")
+    assert invoice["intent"] == "invoice"
+    assert fraud["intent"] == "fraud_risk"
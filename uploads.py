@@ -0,0 +1,38 @@
+import mmap
+import os
+import shutil
+
+
+class SpooledUpload:
+    # A large binary upload kept on disk instead of in memory. Slicing reads
+    # just the requested prefix (enough for classifier samples) and parsers get
+    # a read-only memory map via open_stream().
+    def __init__(self, path: str):
+        self.path = path
+
+    def __len__(self):
+        return os.path.getsize(self.path)
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice) or item.step is not None or (item.start or 0) < 0:
+            raise TypeError("SpooledUpload only supports forward slices")
+        start = item.start or 0
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            if item.stop is None:
+                return f.read()
+            return f.read(max(0, item.stop - start))
+
+    def open_stream(self) -> mmap.mmap:
+        with open(self.path, 'rb') as f:
+            # The map stays valid after the file object is closed
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def spool_upload(source, upload_dir: str, name: str, chunk_size: int = 1024 * 1024) -> SpooledUpload:
+    os.makedirs(upload_dir, exist_ok=True)
+    path = os.path.join(upload_dir, name)
+    source.seek(0)
+    with open(path, 'wb') as target:
+        shutil.copyfileobj(source, target, chunk_size)
+    return SpooledUpload(path)
@@ -264,7 +264,7 @@ if "current_request" in st.session_state:
 with history_tab:
     st.subheader("Recent Processing Requests")
     try:
-        response = requests.get(f"{API_BASE_URL}/requests")
+        response = requests.get(f"{API_BASE_URL}/requests", params={"limit": 50})
         if response.status_code == 200:
             requests_data = response.json()
 